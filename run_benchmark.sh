@@ -1,7 +1,8 @@
 #!/bin/bash
 # Nooshdaroo Protocol Benchmark Script
 # Tests all supported protocols with 100MB file download
-# Server and client bind to 127.0.0.1
+# Server and client bind to $BENCH_HOST (default 127.0.0.1); set distinct
+# BENCH_SOCKS_PORT/BENCH_SERVER_PORT/BENCH_RESULTS_FILE to run several at once
 
 set -e
 
@@ -11,15 +12,77 @@ PUBLIC_KEY="+jIjeirgxTa1QGiujHnlMN2dr3Ks6xYzhnpuZ/E+NmY="
 
 # Test URL - 100MB file from nooshdaroo.net
 TEST_URL="https://nooshdaroo.net/100MB"
-SOCKS_PORT=10080
-SERVER_PORT=18443
+BENCH_HOST=${BENCH_HOST:-127.0.0.1}
+SOCKS_PORT=${BENCH_SOCKS_PORT:-10080}
+SERVER_PORT=${BENCH_SERVER_PORT:-18443}
 
-RESULTS_FILE="benchmark_results.txt"
+RESULTS_FILE=${BENCH_RESULTS_FILE:-benchmark_results.txt}
 
-echo "=== Nooshdaroo Protocol Benchmark ===" | tee $RESULTS_FILE
-echo "Date: $(date)" | tee -a $RESULTS_FILE
-echo "Test URL: $TEST_URL" | tee -a $RESULTS_FILE
-echo "" | tee -a $RESULTS_FILE
+# The results file stays open on fd 4 for the whole run, so log() does not
+# reopen it for every line
+exec 4>"$RESULTS_FILE"
+
+# Print a line and append it to the results file, using only builtins
+log() {
+    printf '%s\n' "$*"
+    printf '%s\n' "$*" >&4
+}
+
+# Generated configs live in a scratch directory, on tmpfs when available
+if [ -d /dev/shm ]; then
+    BENCH_DIR=$(mktemp -d /dev/shm/nooshdaroo-bench.XXXXXX)
+else
+    BENCH_DIR=$(mktemp -d)
+fi
+SERVER_CONFIG="$BENCH_DIR/server.toml"
+CLIENT_CONFIG="$BENCH_DIR/client.toml"
+
+SERVER_PID=
+CLIENT_PID=
+
+# Stop the server and client of the current protocol, if running; anything
+# still alive 2s after SIGTERM is killed so its port is free for the next test
+stop_processes() {
+    local i
+    if [ -n "$SERVER_PID$CLIENT_PID" ]; then
+        kill $SERVER_PID $CLIENT_PID 2>/dev/null || true
+        for ((i = 0; i < 40; i++)); do
+            kill -0 $SERVER_PID $CLIENT_PID 2>/dev/null || break
+            sleep 0.05
+        done
+        kill -9 $SERVER_PID $CLIENT_PID 2>/dev/null || true
+        wait $SERVER_PID $CLIENT_PID 2>/dev/null || true
+    fi
+    SERVER_PID=
+    CLIENT_PID=
+}
+
+# Always stop child processes and remove the scratch directory, including
+# when set -e or Ctrl-C ends the run early
+cleanup() {
+    stop_processes
+    rm -rf "$BENCH_DIR"
+}
+trap cleanup EXIT
+trap 'exit 130' INT TERM
+
+# Concurrent downloads per test with BENCH_PARALLEL=N (0 skips them)
+PARALLEL=${BENCH_PARALLEL:-0}
+
+# Server and client logs go to fd 5: a duplicate of stderr when
+# BENCH_VERBOSE=1, /dev/null otherwise. Duplicating the descriptor, rather
+# than reopening /dev/stderr, keeps one shared offset, so a stderr
+# redirected to a file is neither truncated nor overwritten per process.
+if [ "${BENCH_VERBOSE:-0}" = "1" ]; then
+    exec 5>&2
+else
+    exec 5>/dev/null
+fi
+
+log "=== Nooshdaroo Protocol Benchmark ==="
+log "Date: $(date)"
+log "Test URL: $TEST_URL"
+log
 
 # List of protocols to test (TCP-based only)
 PROTOCOLS=(
@@ -31,120 +94,176 @@ PROTOCOLS=(
     "tls13"
 )
 
-# Function to create server config
-create_server_config() {
-    local protocol=$1
-    cat > server-bench.toml << EOF
-mode = "server"
+# Write a config: the sections both roles share, then the role-specific ones
+write_config() {
+    local path=$1 mode=$2 protocol=$3 role_sections=$4
+    cat > "$path" << EOF
+mode = "$mode"
 
 [encryption]
 cipher = "cha-cha20-poly1305"
 key_derivation = "argon2"
 
-[socks]
-listen_addr = "127.0.0.1:$SOCKS_PORT"
-auth_required = false
-
 [shapeshift]
 strategy = { type = "fixed", protocol = "$protocol" }
 
+$role_sections
+EOF
+}
+
+# Function to create server config
+create_server_config() {
+    write_config "$SERVER_CONFIG" server "$1" "[socks]
+listen_addr = \"$BENCH_HOST:$SOCKS_PORT\"
+auth_required = false
+
 [server]
-listen_addr = "127.0.0.1:$SERVER_PORT"
+listen_addr = \"$BENCH_HOST:$SERVER_PORT\"
 
 [transport]
-local_private_key = "$PRIVATE_KEY"
-EOF
+local_private_key = \"$PRIVATE_KEY\""
 }
 
 # Function to create client config
 create_client_config() {
-    local protocol=$1
-    cat > client-bench.toml << EOF
-mode = "client"
+    write_config "$CLIENT_CONFIG" client "$1" "[socks]
+listen_addr = \"$BENCH_HOST:$SOCKS_PORT\"
+server_address = \"$BENCH_HOST:$SERVER_PORT\"
+auth_required = false
 
-[encryption]
-cipher = "cha-cha20-poly1305"
-key_derivation = "argon2"
+[transport]
+remote_public_key = \"$PUBLIC_KEY\""
+}
 
-[socks]
-listen_addr = "127.0.0.1:$SOCKS_PORT"
-server_address = "127.0.0.1:$SERVER_PORT"
-auth_required = false
+# Whether something accepts TCP connections on $BENCH_HOST:$1
+port_open() {
+    { exec 3<>/dev/tcp/$BENCH_HOST/$1; } 2>/dev/null && exec 3>&-
+}
 
-[shapeshift]
-strategy = { type = "fixed", protocol = "$protocol" }
+# Wait until port $1 accepts connections, failing early if process $2
+# ($3 names it in the log) exits first, or after 10s
+wait_for_port() {
+    local port=$1 pid=$2 name=$3
+    local i status
+    for ((i = 0; i < 200; i++)); do
+        if port_open $port; then
+            return 0
+        fi
+        if ! kill -0 $pid 2>/dev/null; then
+            wait $pid && status=0 || status=$?
+            log "  The $name exited (status $status) before listening on port $port"
+            return 1
+        fi
+        sleep 0.05
+    done
+    log "  Timed out waiting for the $name on port $port"
+    return 1
+}
 
-[transport]
-remote_public_key = "$PUBLIC_KEY"
-EOF
+# Download TEST_URL three times with a single curl process and log each
+# speed, indented by $1; remaining arguments go to curl (e.g. the proxy).
+# Sets avg_speed in MB/s.
+run_downloads() {
+    local indent=$1
+    shift
+
+    local speeds total=0 i speed
+    speeds=($(curl -s "$@" -w "%{speed_download}\n" \
+        -o /dev/null -o /dev/null -o /dev/null "$TEST_URL" "$TEST_URL" "$TEST_URL" || true))
+
+    for i in 0 1 2; do
+        speed=${speeds[i]:-0}
+        log "${indent}Run $((i + 1)): $(echo "scale=2; $speed / 1048576" | bc) MB/s"
+        total=$(echo "$total + $speed" | bc)
+    done
+    avg_speed=$(echo "scale=2; $total / 3 / 1048576" | bc)
+}
+
+# Download TEST_URL $PARALLEL times concurrently with one curl process and
+# log the aggregate throughput; arguments as for run_downloads
+run_parallel_downloads() {
+    local indent=$1
+    shift
+
+    local transfers=() i
+    for ((i = 0; i < PARALLEL; i++)); do
+        transfers+=(-o /dev/null "$TEST_URL")
+    done
+
+    # All transfers start together, so the slowest one is the wall time
+    local summary
+    summary=$( (curl -s --parallel --parallel-max "$PARALLEL" "$@" \
+        -w "%{size_download} %{time_total}\n" "${transfers[@]}" 2>/dev/null || true) | awk '
+        { bytes += $1; if (NR == 1 || $2 < fastest) fastest = $2; if ($2 > slowest) slowest = $2 }
+        END {
+            mbps = slowest > 0 ? bytes / slowest / 1048576 : 0
+            printf "%.2f MB/s aggregate (fastest %.2fs, slowest %.2fs)", mbps, fastest, slowest
+        }')
+    log "${indent}Parallel x$PARALLEL: $summary"
 }
 
 # Function to run benchmark
 run_benchmark() {
     local protocol=$1
 
-    echo "Testing protocol: $protocol" | tee -a $RESULTS_FILE
+    log "Testing protocol: $protocol"
 
     # Create configs
     create_server_config "$protocol"
     create_client_config "$protocol"
 
-    # Kill any existing processes
-    pkill -9 nooshdaroo 2>/dev/null || true
-    sleep 1
+    # Another run (or a leftover process) on these ports would answer
+    # the readiness checks below, so skip this protocol instead
+    if port_open $SERVER_PORT || port_open $SOCKS_PORT; then
+        log "  Port $SERVER_PORT or $SOCKS_PORT is already in use, skipping $protocol"
+        log
+        return 0
+    fi
 
-    # Start server
-    ./target/release/nooshdaroo -c server-bench.toml server &
+    # Start server and client together; the client only dials the server
+    # once a SOCKS connection arrives, so their startups can overlap
+    ./target/release/nooshdaroo -c "$SERVER_CONFIG" server >&5 2>&1 4>&- 5>&- &
     SERVER_PID=$!
-    sleep 2
-
-    # Start client
-    ./target/release/nooshdaroo -c client-bench.toml client &
+    ./target/release/nooshdaroo -c "$CLIENT_CONFIG" client >&5 2>&1 4>&- 5>&- &
     CLIENT_PID=$!
-    sleep 3
+    # A protocol that fails to start is skipped; set -e must not end the
+    # whole run, so the remaining protocols are still measured
+    if ! wait_for_port $SERVER_PORT $SERVER_PID server ||
+        ! wait_for_port $SOCKS_PORT $CLIENT_PID client; then
+        stop_processes
+        log "  Skipping $protocol"
+        log
+        return 0
+    fi
 
     # Run download test (3 runs)
-    echo "  Running 3 downloads..." | tee -a $RESULTS_FILE
-
-    total_speed=0
-    for i in 1 2 3; do
-        speed=$(curl -x socks5h://127.0.0.1:$SOCKS_PORT -o /dev/null -w "%{speed_download}" "$TEST_URL" 2>/dev/null || echo "0")
-        speed_mb=$(echo "scale=2; $speed / 1048576" | bc)
-        echo "    Run $i: ${speed_mb} MB/s" | tee -a $RESULTS_FILE
-        total_speed=$(echo "$total_speed + $speed" | bc)
-    done
+    log "  Running 3 downloads..."
 
-    avg_speed=$(echo "scale=2; $total_speed / 3 / 1048576" | bc)
-    echo "  Average: ${avg_speed} MB/s" | tee -a $RESULTS_FILE
-    echo "" | tee -a $RESULTS_FILE
+    run_downloads "    " -x socks5h://$BENCH_HOST:$SOCKS_PORT
+    log "  Average: ${avg_speed} MB/s"
+    if [ "$PARALLEL" -gt 0 ]; then
+        run_parallel_downloads "  " -x socks5h://$BENCH_HOST:$SOCKS_PORT
+    fi
+    log
 
-    # Cleanup
-    kill $SERVER_PID $CLIENT_PID 2>/dev/null || true
-    sleep 1
+    # Waiting for exit frees the ports for the next protocol
+    stop_processes
 }
 
 # First, get baseline (direct connection)
-echo "=== Baseline (Direct Connection) ===" | tee -a $RESULTS_FILE
-total_speed=0
-for i in 1 2 3; do
-    speed=$(curl -o /dev/null -w "%{speed_download}" "$TEST_URL" 2>/dev/null || echo "0")
-    speed_mb=$(echo "scale=2; $speed / 1048576" | bc)
-    echo "  Run $i: ${speed_mb} MB/s" | tee -a $RESULTS_FILE
-    total_speed=$(echo "$total_speed + $speed" | bc)
-done
-baseline_avg=$(echo "scale=2; $total_speed / 3 / 1048576" | bc)
-echo "Baseline Average: ${baseline_avg} MB/s" | tee -a $RESULTS_FILE
-echo "" | tee -a $RESULTS_FILE
+log "=== Baseline (Direct Connection) ==="
+run_downloads "  "
+log "Baseline Average: ${avg_speed} MB/s"
+if [ "$PARALLEL" -gt 0 ]; then
+    run_parallel_downloads ""
+fi
+log
 
 # Run tests for each protocol
-echo "=== Protocol Tests ===" | tee -a $RESULTS_FILE
+log "=== Protocol Tests ==="
 for protocol in "${PROTOCOLS[@]}"; do
     run_benchmark "$protocol"
 done
 
-# Cleanup
-pkill -9 nooshdaroo 2>/dev/null || true
-rm -f server-bench.toml client-bench.toml
-
-echo "=== Benchmark Complete ===" | tee -a $RESULTS_FILE
+log "=== Benchmark Complete ==="
 echo "Results saved to $RESULTS_FILE"
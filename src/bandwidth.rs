@@ -184,6 +184,15 @@ pub struct NetworkMonitor {
     /// Throughput samples (bytes/sec)
     throughput_samples: VecDeque<u64>,
 
+    /// Running totals over `rtt_samples`, kept in step with the window
+    /// so metrics() doesn't rescan it (jitter uses whole milliseconds)
+    rtt_sum: Duration,
+    rtt_ms_sum: u128,
+    rtt_ms_sq_sum: u128,
+
+    /// Running total over `throughput_samples`
+    throughput_sum: u64,
+
     /// Packet loss tracking
     packets_sent: u64,
     packets_lost: u64,
@@ -204,6 +213,10 @@ impl NetworkMonitor {
         Self {
             rtt_samples: VecDeque::with_capacity(sample_window),
             throughput_samples: VecDeque::with_capacity(sample_window),
+            rtt_sum: Duration::ZERO,
+            rtt_ms_sum: 0,
+            rtt_ms_sq_sum: 0,
+            throughput_sum: 0,
             packets_sent: 0,
             packets_lost: 0,
             sample_window,
@@ -215,8 +228,17 @@ impl NetworkMonitor {
     /// Record RTT measurement
     pub fn record_rtt(&mut self, rtt: Duration) {
         if self.rtt_samples.len() >= self.sample_window {
-            self.rtt_samples.pop_front();
+            if let Some(old) = self.rtt_samples.pop_front() {
+                let ms = old.as_millis();
+                self.rtt_sum -= old;
+                self.rtt_ms_sum -= ms;
+                self.rtt_ms_sq_sum -= ms * ms;
+            }
         }
+        let ms = rtt.as_millis();
+        self.rtt_sum += rtt;
+        self.rtt_ms_sum += ms;
+        self.rtt_ms_sq_sum += ms * ms;
         self.rtt_samples.push_back(rtt);
     }
 
@@ -238,8 +260,11 @@ impl NetworkMonitor {
             let throughput = (self.bytes_transferred as f64 / elapsed.as_secs_f64()) as u64;
 
             if self.throughput_samples.len() >= self.sample_window {
-                self.throughput_samples.pop_front();
+                if let Some(old) = self.throughput_samples.pop_front() {
+                    self.throughput_sum -= old;
+                }
             }
+            self.throughput_sum += throughput;
             self.throughput_samples.push_back(throughput);
 
             self.bytes_transferred = 0;
@@ -252,20 +277,16 @@ impl NetworkMonitor {
         let rtt = if self.rtt_samples.is_empty() {
             Duration::from_millis(100)
         } else {
-            let sum: Duration = self.rtt_samples.iter().sum();
-            sum / self.rtt_samples.len() as u32
+            self.rtt_sum / self.rtt_samples.len() as u32
         };
 
         let jitter = if self.rtt_samples.len() > 1 {
-            let mean = rtt;
-            let variance: f64 = self.rtt_samples
-                .iter()
-                .map(|r| {
-                    let diff = r.as_millis() as f64 - mean.as_millis() as f64;
-                    diff * diff
-                })
-                .sum::<f64>()
-                / self.rtt_samples.len() as f64;
+            // sum((x - mean)^2) = sum(x^2) - 2 * mean * sum(x) + n * mean^2
+            let n = self.rtt_samples.len() as i128;
+            let mean = rtt.as_millis() as i128;
+            let squared_diffs = self.rtt_ms_sq_sum as i128 - 2 * mean * self.rtt_ms_sum as i128
+                + n * mean * mean;
+            let variance = squared_diffs as f64 / n as f64;
             Duration::from_millis(variance.sqrt() as u64)
         } else {
             Duration::from_millis(0)
@@ -274,7 +295,7 @@ impl NetworkMonitor {
         let throughput = if self.throughput_samples.is_empty() {
             1_000_000 // Assume 1 Mbps default
         } else {
-            self.throughput_samples.iter().sum::<u64>() / self.throughput_samples.len() as u64
+            self.throughput_sum / self.throughput_samples.len() as u64
         };
 
         let packet_loss = if self.packets_sent == 0 {
@@ -296,6 +317,10 @@ impl NetworkMonitor {
     pub fn reset(&mut self) {
         self.rtt_samples.clear();
         self.throughput_samples.clear();
+        self.rtt_sum = Duration::ZERO;
+        self.rtt_ms_sum = 0;
+        self.rtt_ms_sq_sum = 0;
+        self.throughput_sum = 0;
         self.packets_sent = 0;
         self.packets_lost = 0;
         self.bytes_transferred = 0;
@@ -534,6 +559,20 @@ mod tests {
         assert!(metrics.rtt.as_millis() >= 50);
     }
 
+    #[test]
+    fn test_network_monitor_window() {
+        let mut monitor = NetworkMonitor::new(3);
+
+        // Oldest samples fall out of the running totals with the window
+        for ms in [1000, 1000, 40, 50, 60] {
+            monitor.record_rtt(Duration::from_millis(ms));
+        }
+
+        let metrics = monitor.metrics();
+        assert_eq!(metrics.rtt, Duration::from_millis(50));
+        assert_eq!(metrics.jitter, Duration::from_millis(8)); // sqrt(200 / 3)
+    }
+
     #[test]
     fn test_bandwidth_controller_adaptation() {
         let mut controller = BandwidthController::new();
@@ -39,6 +39,9 @@ async fn main() -> Result<(), Box<dyn std::error::Error>> {
 
     loop {
         let (socket, client_addr) = listener.accept().await?;
+        if let Err(e) = socket.set_nodelay(true) {
+            log::debug!("Failed to set TCP_NODELAY for {}: {}", client_addr, e);
+        }
         println!("[SOCKS] New connection from {}", client_addr);
 
         let dns_server = dns_server_addr;
@@ -150,7 +153,7 @@ async fn handle_socks_connection(
             match socks_read.read(&mut buf).await {
                 Ok(0) => break, // EOF
                 Ok(n) => {
-                    println!("[→DNS] Sending {} bytes", n);
+                    log::debug!("[→DNS] Sending {} bytes", n);
                     if let Err(e) = dns_client_send.send_and_receive(buf[0..n].to_vec()).await {
                         eprintln!("[DNS] Send error: {}", e);
                         break;
@@ -174,7 +177,7 @@ async fn handle_socks_connection(
 
             match dns_client_recv.send_and_receive(b"PING".to_vec()).await {
                 Ok(data) if data.len() > 0 && data != b"PONG" => {
-                    println!("[←DNS] Received {} bytes", data.len());
+                    log::debug!("[←DNS] Received {} bytes", data.len());
                     if let Err(e) = socks_write.write_all(&data).await {
                         eprintln!("[SOCKS] Write error: {}", e);
                         break;
@@ -37,17 +37,18 @@ async fn main() -> Result<(), Box<dyn std::error::Error + Send + Sync>> {
             let sessions = sessions.clone();
 
             async move {
-                let payload_str = String::from_utf8_lossy(&payload);
-                println!(
+                // Preview is only formatted when debug logging is enabled
+                log::debug!(
                     "[DNS] Session {:04x} from {}: {}",
                     session_id,
                     client_addr,
-                    payload_str.chars().take(100).collect::<String>()
+                    String::from_utf8_lossy(&payload[..payload.len().min(100)])
                 );
 
                 // Check if this is a CONNECT request
-                if payload_str.starts_with("CONNECT ") {
+                if payload.starts_with(b"CONNECT ") {
                     // Parse "CONNECT host:port"
+                    let payload_str = String::from_utf8_lossy(&payload);
                     let parts: Vec<&str> = payload_str.split_whitespace().collect();
                     if parts.len() != 2 {
                         return Ok(b"ERROR: Invalid CONNECT format".to_vec());
@@ -72,7 +73,7 @@ async fn main() -> Result<(), Box<dyn std::error::Error + Send + Sync>> {
                             Ok(format!("ERROR: {}", e).into_bytes())
                         }
                     }
-                } else if payload_str == "PING" {
+                } else if payload == b"PING" {
                     // Keepalive ping
                     Ok(b"PONG".to_vec())
                 } else {
@@ -82,10 +83,10 @@ async fn main() -> Result<(), Box<dyn std::error::Error + Send + Sync>> {
                     if let Some(stream) = sessions_lock.get_mut(&session_id) {
                         match stream.write_all(&payload).await {
                             Ok(_) => {
-                                println!("[→DEST] Session {:04x} sent {} bytes", session_id, payload.len());
+                                log::debug!("[→DEST] Session {:04x} sent {} bytes", session_id, payload.len());
 
                                 // Try to read response
-                                let mut buf = vec![0u8; 4096];
+                                let mut buf = [0u8; 4096];
                                 match tokio::time::timeout(
                                     tokio::time::Duration::from_millis(100),
                                     stream.read(&mut buf),
@@ -93,7 +94,7 @@ async fn main() -> Result<(), Box<dyn std::error::Error + Send + Sync>> {
                                 .await
                                 {
                                     Ok(Ok(n)) if n > 0 => {
-                                        println!("[←DEST] Session {:04x} received {} bytes", session_id, n);
+                                        log::debug!("[←DEST] Session {:04x} received {} bytes", session_id, n);
                                         Ok(buf[0..n].to_vec())
                                     }
                                     _ => Ok(b"".to_vec()), // No data yet
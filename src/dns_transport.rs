@@ -102,7 +102,7 @@ impl DnsTransportClient {
     /// Receive data from DNS tunnel
     pub async fn receive(&self) -> Result<Vec<u8>> {
         // Wait for DNS response (using recv() not recv_from() since socket is connected)
-        let mut buf = vec![0u8; 4096];
+        let mut buf = [0u8; 4096];
 
         let n = timeout(Duration::from_secs(10), self.socket.recv(&mut buf))
             .await
@@ -151,7 +151,7 @@ impl DnsTransportServer {
 
     /// Receive DNS query from client
     pub async fn receive_query(&self) -> Result<(Vec<u8>, SocketAddr, u16)> {
-        let mut buf = vec![0u8; 4096];
+        let mut buf = [0u8; 4096];
 
         // Receive UDP packet
         let (n, src_addr) = self.socket.recv_from(&mut buf).await?;
@@ -34,35 +34,54 @@ fn get_tunnel_domain(seed: u8) -> &'static str {
 /// - Data bytes (base32 encoded payload chunk)
 /// - Terminated with \x00
 pub fn encode_qname_with_seed(payload: &[u8], seed: u8) -> Vec<u8> {
-    let mut qname = Vec::new();
-
-    // Hex encode the payload (2x expansion)
-    let hex_payload = hex::encode(payload);
-
-    // Split into chunks that fit in DNS labels (max 63 chars)
-    let chunks: Vec<&str> = hex_payload
-        .as_bytes()
-        .chunks(MAX_LABEL_LEN)
-        .map(|chunk| std::str::from_utf8(chunk).unwrap())
-        .collect();
-
-    // Encode each chunk as a DNS label
-    for chunk in chunks {
-        qname.push(chunk.len() as u8);
-        qname.extend_from_slice(chunk.as_bytes());
+    let mut qname = Vec::with_capacity(qname_capacity(payload, seed));
+    write_qname(&mut qname, payload, seed);
+    qname
+}
+
+/// Upper bound on the encoded QNAME size for `payload`
+fn qname_capacity(payload: &[u8], seed: u8) -> usize {
+    let hex_len = payload.len() * 2;
+    hex_len + hex_len / MAX_LABEL_LEN + get_tunnel_domain(seed).len() + 3
+}
+
+/// Append the QNAME for `payload` to `out`; see `encode_qname_with_seed`
+fn write_qname(out: &mut Vec<u8>, payload: &[u8], seed: u8) {
+    let domain = get_tunnel_domain(seed);
+    let hex_len = payload.len() * 2;
+
+    // Hex encode the payload (2x expansion) directly into labels of max 63 chars
+    let mut hex_offset = 0;
+    while hex_offset < hex_len {
+        let label_len = (hex_len - hex_offset).min(MAX_LABEL_LEN);
+        out.push(label_len as u8);
+        extend_hex(out, payload, hex_offset, label_len);
+        hex_offset += label_len;
     }
 
     // Append base domain (rotated based on seed)
-    let domain = get_tunnel_domain(seed);
     for part in domain.split('.') {
-        qname.push(part.len() as u8);
-        qname.extend_from_slice(part.as_bytes());
+        out.push(part.len() as u8);
+        out.extend_from_slice(part.as_bytes());
     }
 
     // Null terminator
-    qname.push(0);
+    out.push(0);
+}
 
-    qname
+/// Lowercase hex digits, matching `hex::encode`
+const HEX_DIGITS: &[u8; 16] = b"0123456789abcdef";
+
+/// Append `count` hex digits of `data` to `out`, starting at hex digit `start`
+///
+/// Lets callers hex encode a payload piecewise into labels or TXT strings
+/// without materializing the whole hex string first.
+fn extend_hex(out: &mut Vec<u8>, data: &[u8], start: usize, count: usize) {
+    out.extend((start..start + count).map(|i| {
+        let byte = data[i / 2];
+        let nibble = if i % 2 == 0 { byte >> 4 } else { byte & 0x0f };
+        HEX_DIGITS[nibble as usize]
+    }));
 }
 
 /// Encode payload with default seed (for backwards compatibility)
@@ -82,11 +101,57 @@ fn is_domain_part(label: &str) -> bool {
     DOMAIN_PARTS.contains(&label)
 }
 
+/// Incremental hex decoder fed one label or TXT string at a time
+///
+/// Hex digits are split across labels at arbitrary (possibly odd) offsets,
+/// so a pending high nibble is carried between pushes instead of joining
+/// every piece into one string before decoding.
+struct HexDecoder {
+    out: Vec<u8>,
+    high: Option<u8>,
+}
+
+impl HexDecoder {
+    fn with_capacity(hex_len: usize) -> Self {
+        Self {
+            out: Vec::with_capacity(hex_len / 2),
+            high: None,
+        }
+    }
+
+    fn push(&mut self, digits: &[u8]) -> Result<(), String> {
+        for &c in digits {
+            let nibble = match c {
+                b'0'..=b'9' => c - b'0',
+                b'a'..=b'f' => c - b'a' + 10,
+                b'A'..=b'F' => c - b'A' + 10,
+                _ => return Err(format!("Hex decode error: Invalid character {:?}", c as char)),
+            };
+            match self.high.take() {
+                Some(high) => self.out.push((high << 4) | nibble),
+                None => self.high = Some(nibble),
+            }
+        }
+        Ok(())
+    }
+
+    fn is_empty(&self) -> bool {
+        self.out.is_empty() && self.high.is_none()
+    }
+
+    fn finish(self) -> Result<Vec<u8>, String> {
+        if self.high.is_some() {
+            return Err("Hex decode error: Odd number of digits".to_string());
+        }
+        Ok(self.out)
+    }
+}
+
 /// Decode DNS QNAME back to payload
 ///
-/// Extracts base32-encoded data from subdomain labels
+/// Extracts hex-encoded data from subdomain labels
 pub fn decode_qname(qname: &[u8]) -> Result<Vec<u8>, String> {
-    let mut encoded_data = String::new();
+    let mut decoder = HexDecoder::with_capacity(qname.len());
     let mut pos = 0;
 
     // Read labels until we hit a base domain part
@@ -110,36 +175,34 @@ pub fn decode_qname(qname: &[u8]) -> Result<Vec<u8>, String> {
             break; // Reached base domain
         }
 
-        // Accumulate base32 data
-        encoded_data.push_str(label_str);
+        // Decode hex data straight out of the label
+        decoder.push(label)?;
         pos += len;
     }
 
-    // Decode hex to bytes
-    hex::decode(&encoded_data).map_err(|e| format!("Hex decode error: {}", e))
+    decoder.finish()
 }
 
+/// Query header after the transaction ID: flags (standard query), QDCOUNT 1,
+/// ANCOUNT 0, NSCOUNT 0, ARCOUNT 0
+const QUERY_FLAGS_COUNTS: [u8; 10] = [0x01, 0x00, 0x00, 0x01, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00];
+
+/// Query question tail: QTYPE A, QCLASS IN
+const QUERY_TYPE_CLASS: [u8; 4] = [0x00, 0x01, 0x00, 0x01];
+
 /// Build a complete DNS query packet
 pub fn build_dns_query(payload: &[u8], transaction_id: u16) -> Vec<u8> {
-    let mut packet = Vec::new();
+    // Same seed as encode_qname
+    let seed = payload.first().copied().unwrap_or(0);
+    let mut packet = Vec::with_capacity(12 + qname_capacity(payload, seed) + QUERY_TYPE_CLASS.len());
 
     // Header (12 bytes)
     packet.extend_from_slice(&transaction_id.to_be_bytes()); // Transaction ID
-    packet.extend_from_slice(&[0x01, 0x00]); // Flags: standard query
-    packet.extend_from_slice(&[0x00, 0x01]); // QDCOUNT: 1 question
-    packet.extend_from_slice(&[0x00, 0x00]); // ANCOUNT: 0 answers
-    packet.extend_from_slice(&[0x00, 0x00]); // NSCOUNT: 0 authority
-    packet.extend_from_slice(&[0x00, 0x00]); // ARCOUNT: 0 additional
+    packet.extend_from_slice(&QUERY_FLAGS_COUNTS);
 
     // Question section (use real domains: challenges.cloudflare.com or www.google.com)
-    let qname = encode_qname(payload);
-    packet.extend_from_slice(&qname);
-
-    // QTYPE: A record (0x0001)
-    packet.extend_from_slice(&[0x00, 0x01]);
-
-    // QCLASS: IN (0x0001)
-    packet.extend_from_slice(&[0x00, 0x01]);
+    write_qname(&mut packet, payload, seed);
+    packet.extend_from_slice(&QUERY_TYPE_CLASS);
 
     packet
 }
@@ -153,6 +216,17 @@ const TXT_RECORD_OVERHEAD: usize = 12;
 /// Marker prefix for data TXT records (looks like version record, e.g., SPF "v=spf1")
 const DATA_MARKER_BUILD: &str = "v=";
 
+/// Response header after the transaction ID: flags (standard response),
+/// QDCOUNT 1, ANCOUNT placeholder (patched once answers are added), NSCOUNT 0, ARCOUNT 0
+const RESPONSE_FLAGS_COUNTS: [u8; 10] = [0x81, 0x80, 0x00, 0x01, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00];
+
+/// TXT answer record prefix: NAME pointer to question, TYPE TXT, CLASS IN, TTL 60 seconds
+const TXT_RECORD_PREFIX: [u8; 10] = [0xc0, 0x0c, 0x00, 0x10, 0x00, 0x01, 0x00, 0x00, 0x00, 0x3c];
+
+/// Question section used when no query is echoed: google.com, QTYPE TXT, QCLASS IN
+/// (TUNNEL_DOMAINS[0] in wire format)
+const DEFAULT_QUESTION: &[u8] = b"\x06google\x03com\x00\x00\x10\x00\x01";
+
 /// Decoy TXT records that look like legitimate DNS TXT records
 /// These help fool DPI by making the response look like normal DNS traffic
 /// IMPORTANT: None should start with "v=" to avoid confusion with data marker
@@ -175,18 +249,13 @@ pub fn build_dns_response(
     payload: &[u8],
     transaction_id: u16,
 ) -> Vec<u8> {
-    let mut packet = Vec::new();
+    let mut packet = Vec::with_capacity(MAX_DNS_UDP_SIZE);
 
     // Header (12 bytes) - ANCOUNT will be updated later
     packet.extend_from_slice(&transaction_id.to_be_bytes()); // Transaction ID
-    packet.extend_from_slice(&[0x81, 0x80]); // Flags: standard response
-    packet.extend_from_slice(&[0x00, 0x01]); // QDCOUNT: 1 question
-    packet.extend_from_slice(&[0x00, 0x00]); // ANCOUNT: placeholder (will update)
-    packet.extend_from_slice(&[0x00, 0x00]); // NSCOUNT: 0
-    packet.extend_from_slice(&[0x00, 0x00]); // ARCOUNT: 0
+    packet.extend_from_slice(&RESPONSE_FLAGS_COUNTS);
 
     // Echo the question section from query (skip header)
-    let question_section_len;
     if query.len() > 12 {
         let question_start = 12;
         let mut question_end = question_start;
@@ -201,23 +270,10 @@ pub fn build_dns_response(
 
         if question_end <= query.len() {
             packet.extend_from_slice(&query[question_start..question_end]);
-            question_section_len = question_end - question_start;
-        } else {
-            question_section_len = 0;
         }
     } else {
-        // If no query provided, create a minimal question section
-        // Use the first domain from TUNNEL_DOMAINS
-        let domain = get_tunnel_domain(0);
-        let start_len = packet.len();
-        for part in domain.split('.') {
-            packet.push(part.len() as u8);
-            packet.extend_from_slice(part.as_bytes());
-        }
-        packet.push(0); // Null terminator
-        packet.extend_from_slice(&[0x00, 0x10]); // QTYPE: TXT
-        packet.extend_from_slice(&[0x00, 0x01]); // QCLASS: IN
-        question_section_len = packet.len() - start_len;
+        // If no query provided, use a minimal question section
+        packet.extend_from_slice(DEFAULT_QUESTION);
     }
 
     let mut answer_count = 0u16;
@@ -229,10 +285,7 @@ pub fn build_dns_response(
 
     // Only add decoy if it fits
     if packet.len() + TXT_RECORD_OVERHEAD + 1 + decoy_bytes.len() < MAX_DNS_UDP_SIZE {
-        packet.extend_from_slice(&[0xc0, 0x0c]); // NAME: pointer to question
-        packet.extend_from_slice(&[0x00, 0x10]); // TYPE: TXT record
-        packet.extend_from_slice(&[0x00, 0x01]); // CLASS: IN
-        packet.extend_from_slice(&[0x00, 0x00, 0x00, 0x3c]); // TTL: 60 seconds
+        packet.extend_from_slice(&TXT_RECORD_PREFIX);
 
         let rdlength = (1 + decoy_bytes.len()) as u16;
         packet.extend_from_slice(&rdlength.to_be_bytes());
@@ -241,15 +294,14 @@ pub fn build_dns_response(
         answer_count += 1;
     }
 
-    // Hex encode payload (marker added only to first record)
-    let hex_payload = hex::encode(payload);
-    let hex_bytes = hex_payload.as_bytes();
+    // Hex encode payload as records are written (marker added only to first record)
+    let hex_len = payload.len() * 2;
 
     // Add data TXT records
     let mut hex_offset = 0;
     let mut is_first_data_record = true;
 
-    while hex_offset < hex_bytes.len() && packet.len() < MAX_DNS_UDP_SIZE {
+    while hex_offset < hex_len && packet.len() < MAX_DNS_UDP_SIZE {
         // How much space left?
         let space_left = MAX_DNS_UDP_SIZE.saturating_sub(packet.len());
 
@@ -261,7 +313,7 @@ pub fn build_dns_response(
 
         // Max data we can fit in this record (accounting for overhead, length byte, and marker)
         let max_txt_data = (space_left - TXT_RECORD_OVERHEAD - 1 - marker_len).min(255 - marker_len);
-        let remaining_hex = hex_bytes.len() - hex_offset;
+        let remaining_hex = hex_len - hex_offset;
         let txt_data_len = remaining_hex.min(max_txt_data);
 
         if txt_data_len == 0 {
@@ -269,10 +321,7 @@ pub fn build_dns_response(
         }
 
         // Write TXT record
-        packet.extend_from_slice(&[0xc0, 0x0c]); // NAME: pointer to question
-        packet.extend_from_slice(&[0x00, 0x10]); // TYPE: TXT record
-        packet.extend_from_slice(&[0x00, 0x01]); // CLASS: IN
-        packet.extend_from_slice(&[0x00, 0x00, 0x00, 0x3c]); // TTL: 60 seconds
+        packet.extend_from_slice(&TXT_RECORD_PREFIX);
 
         // RDLENGTH = 1 (length byte) + marker (if first) + data length
         let total_txt_len = marker_len + txt_data_len;
@@ -285,7 +334,7 @@ pub fn build_dns_response(
             packet.extend_from_slice(DATA_MARKER_BUILD.as_bytes());
             is_first_data_record = false;
         }
-        packet.extend_from_slice(&hex_bytes[hex_offset..hex_offset + txt_data_len]);
+        extend_hex(&mut packet, payload, hex_offset, txt_data_len);
 
         hex_offset += txt_data_len;
         answer_count += 1;
@@ -361,8 +410,8 @@ pub fn parse_dns_response(packet: &[u8]) -> Result<Vec<u8>, String> {
     pos += 1; // Null terminator
     pos += 4; // QTYPE + QCLASS
 
-    // Collect hex data from all TXT answer records
-    let mut encoded_str = String::new();
+    // Decode hex data from all TXT answer records
+    let mut decoder = HexDecoder::with_capacity(packet.len());
     let mut found_data_start = false;
 
     for _ in 0..ancount {
@@ -422,12 +471,12 @@ pub fn parse_dns_response(packet: &[u8]) -> Result<Vec<u8>, String> {
 
                 // Check if this is a data record
                 if txt_str.starts_with(DATA_MARKER) {
-                    // First data record - strip marker and append hex data
-                    encoded_str.push_str(&txt_str[DATA_MARKER.len()..]);
+                    // First data record - strip marker and decode hex data
+                    decoder.push(txt_str[DATA_MARKER.len()..].as_bytes())?;
                     found_data_start = true;
                 } else if found_data_start && is_hex_string(txt_str) {
                     // Continuation record - pure hex data
-                    encoded_str.push_str(txt_str);
+                    decoder.push(txt_str.as_bytes())?;
                 }
                 // else: decoy record or garbage, skip it
 
@@ -438,12 +487,11 @@ pub fn parse_dns_response(packet: &[u8]) -> Result<Vec<u8>, String> {
         pos += rdlength;
     }
 
-    if encoded_str.is_empty() {
+    if decoder.is_empty() {
         return Err("No data TXT records found".to_string());
     }
 
-    // Decode hex to bytes
-    hex::decode(&encoded_str).map_err(|e| format!("Hex decode error: {}", e))
+    decoder.finish()
 }
 
 /// Check if a string contains only valid hexadecimal characters
@@ -469,6 +517,32 @@ mod tests {
         assert_eq!(decoded, payload);
     }
 
+    #[test]
+    fn test_qname_decoding_across_odd_labels() {
+        // 100 bytes = 200 hex chars, split into 63-char labels so bytes straddle labels
+        let payload: Vec<u8> = (0..100).collect();
+        let qname = encode_qname(&payload);
+        assert_eq!(decode_qname(&qname).unwrap(), payload);
+
+        // Non-hex label data is rejected
+        assert!(decode_qname(b"\x02zz\x06google\x03com\x00").is_err());
+    }
+
+    #[test]
+    fn test_qname_labels_match_hex_encoding() {
+        // Labels must stay wire-compatible with plain hex::encode output
+        let payload: Vec<u8> = (0..=255).step_by(3).collect();
+        let qname = encode_qname_with_seed(&payload, 0);
+
+        let hex_payload = hex::encode(&payload);
+        let mut expected = Vec::new();
+        for chunk in hex_payload.as_bytes().chunks(MAX_LABEL_LEN) {
+            expected.push(chunk.len() as u8);
+            expected.extend_from_slice(chunk);
+        }
+        assert_eq!(&qname[..expected.len()], &expected[..]);
+    }
+
     #[test]
     fn test_dns_query_building() {
         let payload = b"test data";
@@ -486,6 +560,17 @@ mod tests {
         assert_eq!(decoded, payload);
     }
 
+    #[test]
+    fn test_dns_query_layout() {
+        let payload = [0xab; 40];
+        let packet = build_dns_query(&payload, 0xbeef);
+
+        let mut expected = vec![0xbe, 0xef, 0x01, 0x00, 0x00, 0x01, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00];
+        expected.extend_from_slice(&encode_qname(&payload));
+        expected.extend_from_slice(&[0x00, 0x01, 0x00, 0x01]);
+        assert_eq!(packet, expected);
+    }
+
     #[test]
     fn test_dns_response_building() {
         let query_payload = b"query";
@@ -502,6 +587,23 @@ mod tests {
         assert_eq!(decoded, response_payload);
     }
 
+    #[test]
+    fn test_dns_response_without_query() {
+        // Default question must stay in sync with the first tunnel domain
+        let mut expected = Vec::new();
+        for part in get_tunnel_domain(0).split('.') {
+            expected.push(part.len() as u8);
+            expected.extend_from_slice(part.as_bytes());
+        }
+        expected.extend_from_slice(&[0x00, 0x00, 0x10, 0x00, 0x01]);
+        assert_eq!(DEFAULT_QUESTION, &expected[..]);
+
+        let response = build_dns_response(&[], b"data", 0x1234);
+        assert_eq!(&response[12..12 + expected.len()], &expected[..]);
+
+        assert_eq!(parse_dns_response(&response).unwrap(), b"data");
+    }
+
     #[test]
     fn test_large_response_fragment() {
         // Test with a fragment-sized payload that fits in 512 bytes
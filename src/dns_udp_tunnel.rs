@@ -12,7 +12,11 @@ use std::net::SocketAddr;
 use std::sync::Arc;
 use std::time::{Duration, Instant};
 use tokio::net::UdpSocket;
-use tokio::sync::{RwLock, mpsc, oneshot, Mutex};
+#[cfg(target_os = "linux")]
+use std::os::unix::io::{AsRawFd, RawFd};
+#[cfg(target_os = "linux")]
+use tokio::io::Interest;
+use tokio::sync::{RwLock, mpsc, oneshot, Mutex, Semaphore};
 use crate::dns_tunnel::{build_dns_query, build_dns_response, parse_dns_query, parse_dns_response};
 
 /// Session timeout for UDP tunnel (60 seconds)
@@ -31,9 +35,25 @@ const MAX_DNS_QUERY_PAYLOAD: usize = 115;
 /// Note: build_dns_response dynamically packs what fits, but we use conservative limit
 const MAX_DNS_RESPONSE_PAYLOAD: usize = 180;
 
+/// Largest packet a session may reassemble (64 KiB of data plus a command byte)
+const MAX_REASSEMBLED_SIZE: usize = 65536 + 1;
+
+/// Fragment cap derived from the above; bounds per-session reassembly state
+/// so bogus fragment counts can't grow server memory without limit
+const MAX_PENDING_FRAGMENTS: usize = (MAX_REASSEMBLED_SIZE + MAX_DNS_QUERY_PAYLOAD - DnsTunnelHeader::SIZE - 1)
+    / (MAX_DNS_QUERY_PAYLOAD - DnsTunnelHeader::SIZE);
+
 /// Maximum UDP packet size
 const MAX_UDP_PACKET_SIZE: usize = 512; // DNS standard size
 
+/// Maximum queries handled concurrently by the server; the receive loop
+/// waits for a slot beyond this, leaving excess packets in the socket buffer
+const MAX_INFLIGHT_QUERIES: usize = 512;
+
+/// Datagrams moved per recvmmsg(2)/sendmmsg(2) call on Linux
+#[cfg(target_os = "linux")]
+const RECV_BATCH_SIZE: usize = 64;
+
 /// Number of concurrent POLL queries for pipelining (improves throughput by reducing latency impact)
 const PIPELINE_DEPTH: usize = 3;
 
@@ -92,12 +112,33 @@ impl TunnelSession {
 
     /// Add fragment and attempt reassembly
     fn add_fragment(&mut self, fragment: Fragment) -> Option<Vec<u8>> {
-        self.fragments.insert(fragment.seq_num, fragment.clone());
+        let total_fragments = fragment.total_fragments;
+        if total_fragments as usize > MAX_PENDING_FRAGMENTS || fragment.seq_num >= total_fragments {
+            log::warn!(
+                "Dropping fragment {}/{} for session {:04x}: out of range",
+                fragment.seq_num + 1,
+                total_fragments,
+                self.session_id
+            );
+            return None;
+        }
+
+        // Fragments of a different packet mean the previous one was abandoned
+        if self
+            .fragments
+            .values()
+            .next()
+            .map_or(false, |pending| pending.total_fragments != total_fragments)
+        {
+            self.fragments.clear();
+        }
+
+        self.fragments.insert(fragment.seq_num, fragment);
 
         // Check if we have all fragments
-        if self.fragments.len() == fragment.total_fragments as usize {
+        if self.fragments.len() == total_fragments as usize {
             let mut all_present = true;
-            for i in 0..fragment.total_fragments {
+            for i in 0..total_fragments {
                 if !self.fragments.contains_key(&i) {
                     all_present = false;
                     break;
@@ -107,7 +148,7 @@ impl TunnelSession {
             if all_present {
                 // Reassemble in order
                 let mut reassembled = Vec::new();
-                for i in 0..fragment.total_fragments {
+                for i in 0..total_fragments {
                     if let Some(frag) = self.fragments.get(&i) {
                         reassembled.extend_from_slice(&frag.data);
                     }
@@ -185,36 +226,101 @@ impl DnsUdpTunnelServer {
             Self::cleanup_sessions(sessions).await;
         });
 
+        // Shared so each query can run on its own task
+        let handler = Arc::new(handler);
+        let inflight = Arc::new(Semaphore::new(MAX_INFLIGHT_QUERIES));
+
         // Main packet receiving loop
-        let mut buf = vec![0u8; MAX_UDP_PACKET_SIZE];
-        loop {
-            match socket.recv_from(&mut buf).await {
-                Ok((len, client_addr)) => {
-                    let packet = buf[..len].to_vec();
-                    let socket_clone = socket.clone();
-                    let sessions = self.sessions.clone();
-                    let handler = &handler;
-
-                    // Process DNS query
-                    if let Err(e) = Self::handle_dns_query(
-                        socket_clone,
-                        sessions,
-                        packet,
-                        client_addr,
-                        handler,
-                    )
-                    .await
-                    {
-                        log::error!("Error handling DNS query from {}: {}", client_addr, e);
+        #[cfg(target_os = "linux")]
+        {
+            let mut bufs = vec![vec![0u8; MAX_UDP_PACKET_SIZE]; RECV_BATCH_SIZE];
+            let mut received = Vec::with_capacity(RECV_BATCH_SIZE);
+            loop {
+                // Readiness only fails once the runtime's I/O driver is gone,
+                // so stop serving instead of spinning on the error
+                socket.readable().await?;
+
+                // Drain up to RECV_BATCH_SIZE queued queries with one recvmmsg(2)
+                let fd = socket.as_raw_fd();
+                match socket.try_io(Interest::READABLE, || recv_batch(fd, &mut bufs, &mut received)) {
+                    Ok(()) => {
+                        for &(slot, len, client_addr) in &received {
+                            Self::dispatch_query(
+                                &socket,
+                                &self.sessions,
+                                &handler,
+                                &inflight,
+                                bufs[slot][..len].to_vec(),
+                                client_addr,
+                            )
+                            .await;
+                        }
+                    }
+                    Err(e) if e.kind() == std::io::ErrorKind::WouldBlock => {}
+                    Err(e) => {
+                        log::error!("UDP recvmmsg error: {}", e);
                     }
                 }
-                Err(e) => {
-                    log::error!("UDP recv_from error: {}", e);
+            }
+        }
+
+        #[cfg(not(target_os = "linux"))]
+        {
+            let mut buf = vec![0u8; MAX_UDP_PACKET_SIZE];
+            loop {
+                match socket.recv_from(&mut buf).await {
+                    Ok((len, client_addr)) => {
+                        Self::dispatch_query(
+                            &socket,
+                            &self.sessions,
+                            &handler,
+                            &inflight,
+                            buf[..len].to_vec(),
+                            client_addr,
+                        )
+                        .await;
+                    }
+                    Err(e) => {
+                        log::error!("UDP recv_from error: {}", e);
+                    }
                 }
             }
         }
     }
 
+    /// Hand one received query to its own task, waiting for an in-flight slot
+    async fn dispatch_query<F, Fut>(
+        socket: &Arc<UdpSocket>,
+        sessions: &Arc<RwLock<HashMap<SessionId, TunnelSession>>>,
+        handler: &Arc<F>,
+        inflight: &Arc<Semaphore>,
+        packet: Vec<u8>,
+        client_addr: SocketAddr,
+    ) where
+        F: Fn(SessionId, SocketAddr, Vec<u8>) -> Fut + Send + Sync + 'static,
+        Fut: std::future::Future<Output = Result<Vec<u8>, String>> + Send + 'static,
+    {
+        let socket_clone = socket.clone();
+        let sessions = sessions.clone();
+        let handler = handler.clone();
+        let permit = inflight
+            .clone()
+            .acquire_owned()
+            .await
+            .expect("query semaphore is never closed");
+
+        // Process DNS query without blocking the receive loop,
+        // so a slow handler (e.g. a POLL wait) doesn't stall other sessions
+        tokio::spawn(async move {
+            let _permit = permit;
+            if let Err(e) =
+                Self::handle_dns_query(socket_clone, sessions, packet, client_addr, &*handler).await
+            {
+                log::error!("Error handling DNS query from {}: {}", client_addr, e);
+            }
+        });
+    }
+
     async fn handle_dns_query<F, Fut>(
         socket: Arc<UdpSocket>,
         sessions: Arc<RwLock<HashMap<SessionId, TunnelSession>>>,
@@ -227,7 +333,7 @@ impl DnsUdpTunnelServer {
         Fut: std::future::Future<Output = Result<Vec<u8>, String>> + Send + 'static,
     {
         // Parse DNS query
-        let (transaction_id, payload) = parse_dns_query(&packet)
+        let (transaction_id, mut payload) = parse_dns_query(&packet)
             .map_err(|e| format!("Failed to parse DNS query: {}", e))?;
 
         log::debug!(
@@ -239,7 +345,9 @@ impl DnsUdpTunnelServer {
 
         // Decode tunnel header
         let header = DnsTunnelHeader::decode(&payload)?;
-        let fragment_data = payload[DnsTunnelHeader::SIZE..].to_vec();
+        // Strip the header in place rather than copying the fragment out
+        payload.drain(..DnsTunnelHeader::SIZE);
+        let fragment_data = payload;
 
         log::debug!(
             "Session {:04x}, fragment {}/{}: {} bytes",
@@ -313,18 +421,65 @@ impl DnsUdpTunnelServer {
         mut payload: Vec<u8>,
     ) -> Result<(), String> {
         // Fragment if necessary
-        let fragments = Self::fragment_payload(session_id, &payload);
+        let max_fragment_size = MAX_DNS_RESPONSE_PAYLOAD - DnsTunnelHeader::SIZE;
+        let total_fragments = (payload.len() + max_fragment_size - 1) / max_fragment_size;
 
-        for (seq_num, frag_data) in fragments.iter().enumerate() {
-            // Build DNS response with fragment
-            let response_packet = build_dns_response(
-                &[], // Don't need original query
-                frag_data,
-                transaction_id,
+        // One fragment buffer built from a header template; only the sequence
+        // number and data change between fragments
+        let mut fragment = Vec::with_capacity(MAX_DNS_RESPONSE_PAYLOAD);
+        fragment.extend_from_slice(
+            &DnsTunnelHeader {
+                session_id,
+                seq_num: 0,
+                total_fragments: total_fragments as u16,
+            }
+            .encode(),
+        );
+
+        let packets: Vec<Vec<u8>> = payload
+            .chunks(max_fragment_size)
+            .enumerate()
+            .map(|(seq_num, chunk)| {
+                fragment.truncate(DnsTunnelHeader::SIZE);
+                fragment[2..4].copy_from_slice(&(seq_num as u16).to_be_bytes());
+                fragment.extend_from_slice(chunk);
+                build_dns_response(
+                    &[], // Don't need original query
+                    &fragment,
+                    transaction_id,
+                )
+            })
+            .collect();
+
+        // Multi-fragment responses go out in one sendmmsg(2) call
+        #[cfg(target_os = "linux")]
+        if packets.len() > 1 {
+            let fd = socket.as_raw_fd();
+            let mut sent = 0;
+            while sent < packets.len() {
+                socket
+                    .writable()
+                    .await
+                    .map_err(|e| format!("Failed to send DNS response: {}", e))?;
+                match socket.try_io(Interest::WRITABLE, || send_batch(fd, &packets[sent..], client_addr)) {
+                    Ok(n) => sent += n,
+                    Err(e) if e.kind() == std::io::ErrorKind::WouldBlock => {}
+                    Err(e) => return Err(format!("Failed to send DNS response: {}", e)),
+                }
+            }
+
+            log::debug!(
+                "Sent DNS response to {} (session {:04x}, {} fragments)",
+                client_addr,
+                session_id,
+                packets.len()
             );
+            return Ok(());
+        }
 
+        for (seq_num, response_packet) in packets.iter().enumerate() {
             socket
-                .send_to(&response_packet, client_addr)
+                .send_to(response_packet, client_addr)
                 .await
                 .map_err(|e| format!("Failed to send DNS response: {}", e))?;
 
@@ -333,34 +488,13 @@ impl DnsUdpTunnelServer {
                 client_addr,
                 session_id,
                 seq_num + 1,
-                fragments.len()
+                packets.len()
             );
         }
 
         Ok(())
     }
 
-    fn fragment_payload(session_id: SessionId, payload: &[u8]) -> Vec<Vec<u8>> {
-        let mut fragments = Vec::new();
-        let max_fragment_size = MAX_DNS_RESPONSE_PAYLOAD - DnsTunnelHeader::SIZE;
-
-        let total_fragments = (payload.len() + max_fragment_size - 1) / max_fragment_size;
-
-        for (seq_num, chunk) in payload.chunks(max_fragment_size).enumerate() {
-            let header = DnsTunnelHeader {
-                session_id,
-                seq_num: seq_num as u16,
-                total_fragments: total_fragments as u16,
-            };
-
-            let mut fragment = header.encode().to_vec();
-            fragment.extend_from_slice(chunk);
-            fragments.push(fragment);
-        }
-
-        fragments
-    }
-
     async fn cleanup_sessions(sessions: Arc<RwLock<HashMap<SessionId, TunnelSession>>>) {
         loop {
             tokio::time::sleep(Duration::from_secs(30)).await;
@@ -383,6 +517,128 @@ impl DnsUdpTunnelServer {
     }
 }
 
+/// Receive up to `bufs.len()` datagrams with a single non-blocking recvmmsg(2)
+///
+/// On success `received` holds `(slot, len, source)` for each datagram, where
+/// `slot` is the index of the buffer in `bufs` it was read into. Datagrams
+/// from an unsupported address family are dropped without failing the batch.
+#[cfg(target_os = "linux")]
+fn recv_batch(
+    fd: RawFd,
+    bufs: &mut [Vec<u8>],
+    received: &mut Vec<(usize, usize, SocketAddr)>,
+) -> std::io::Result<()> {
+    let count = bufs.len().min(RECV_BATCH_SIZE);
+    let mut addrs: [libc::sockaddr_storage; RECV_BATCH_SIZE] = unsafe { std::mem::zeroed() };
+    let mut iovecs: [libc::iovec; RECV_BATCH_SIZE] = unsafe { std::mem::zeroed() };
+    let mut msgs: [libc::mmsghdr; RECV_BATCH_SIZE] = unsafe { std::mem::zeroed() };
+
+    for i in 0..count {
+        iovecs[i].iov_base = bufs[i].as_mut_ptr() as *mut libc::c_void;
+        iovecs[i].iov_len = bufs[i].len();
+        msgs[i].msg_hdr.msg_name = &mut addrs[i] as *mut _ as *mut libc::c_void;
+        msgs[i].msg_hdr.msg_namelen = std::mem::size_of::<libc::sockaddr_storage>() as libc::socklen_t;
+        msgs[i].msg_hdr.msg_iov = &mut iovecs[i];
+        msgs[i].msg_hdr.msg_iovlen = 1;
+    }
+
+    let n = unsafe {
+        libc::recvmmsg(
+            fd,
+            msgs.as_mut_ptr(),
+            count as libc::c_uint,
+            libc::MSG_DONTWAIT as _,
+            std::ptr::null_mut(),
+        )
+    };
+    if n < 0 {
+        return Err(std::io::Error::last_os_error());
+    }
+
+    received.clear();
+    for i in 0..n as usize {
+        match sockaddr_to_socket_addr(&addrs[i]) {
+            Some(addr) => received.push((i, msgs[i].msg_len as usize, addr)),
+            None => log::debug!("Dropping datagram from unsupported address family {}", addrs[i].ss_family),
+        }
+    }
+    Ok(())
+}
+
+/// Send `packets` to `dest` with a single non-blocking sendmmsg(2)
+///
+/// Returns how many packets the kernel accepted, which may be fewer than given.
+#[cfg(target_os = "linux")]
+fn send_batch(fd: RawFd, packets: &[Vec<u8>], dest: SocketAddr) -> std::io::Result<usize> {
+    let count = packets.len().min(RECV_BATCH_SIZE);
+    let (mut addr, addr_len) = socket_addr_to_sockaddr(dest);
+    let mut iovecs: [libc::iovec; RECV_BATCH_SIZE] = unsafe { std::mem::zeroed() };
+    let mut msgs: [libc::mmsghdr; RECV_BATCH_SIZE] = unsafe { std::mem::zeroed() };
+
+    for i in 0..count {
+        iovecs[i].iov_base = packets[i].as_ptr() as *mut libc::c_void;
+        iovecs[i].iov_len = packets[i].len();
+        msgs[i].msg_hdr.msg_name = &mut addr as *mut _ as *mut libc::c_void;
+        msgs[i].msg_hdr.msg_namelen = addr_len;
+        msgs[i].msg_hdr.msg_iov = &mut iovecs[i];
+        msgs[i].msg_hdr.msg_iovlen = 1;
+    }
+
+    let n = unsafe {
+        libc::sendmmsg(fd, msgs.as_mut_ptr(), count as libc::c_uint, libc::MSG_DONTWAIT as _)
+    };
+    if n < 0 {
+        return Err(std::io::Error::last_os_error());
+    }
+    Ok(n as usize)
+}
+
+#[cfg(target_os = "linux")]
+fn sockaddr_to_socket_addr(storage: &libc::sockaddr_storage) -> Option<SocketAddr> {
+    match storage.ss_family as libc::c_int {
+        libc::AF_INET => {
+            let addr = unsafe { &*(storage as *const _ as *const libc::sockaddr_in) };
+            let ip = std::net::Ipv4Addr::from(u32::from_be(addr.sin_addr.s_addr));
+            Some(SocketAddr::new(ip.into(), u16::from_be(addr.sin_port)))
+        }
+        libc::AF_INET6 => {
+            let addr = unsafe { &*(storage as *const _ as *const libc::sockaddr_in6) };
+            let ip = std::net::Ipv6Addr::from(addr.sin6_addr.s6_addr);
+            Some(SocketAddr::V6(std::net::SocketAddrV6::new(
+                ip,
+                u16::from_be(addr.sin6_port),
+                addr.sin6_flowinfo,
+                addr.sin6_scope_id,
+            )))
+        }
+        _ => None,
+    }
+}
+
+#[cfg(target_os = "linux")]
+fn socket_addr_to_sockaddr(addr: SocketAddr) -> (libc::sockaddr_storage, libc::socklen_t) {
+    let mut storage: libc::sockaddr_storage = unsafe { std::mem::zeroed() };
+    let len = match addr {
+        SocketAddr::V4(v4) => {
+            let sin = unsafe { &mut *(&mut storage as *mut _ as *mut libc::sockaddr_in) };
+            sin.sin_family = libc::AF_INET as libc::sa_family_t;
+            sin.sin_port = v4.port().to_be();
+            sin.sin_addr.s_addr = u32::from(*v4.ip()).to_be();
+            std::mem::size_of::<libc::sockaddr_in>()
+        }
+        SocketAddr::V6(v6) => {
+            let sin6 = unsafe { &mut *(&mut storage as *mut _ as *mut libc::sockaddr_in6) };
+            sin6.sin6_family = libc::AF_INET6 as libc::sa_family_t;
+            sin6.sin6_port = v6.port().to_be();
+            sin6.sin6_flowinfo = v6.flowinfo();
+            sin6.sin6_addr.s6_addr = v6.ip().octets();
+            sin6.sin6_scope_id = v6.scope_id();
+            std::mem::size_of::<libc::sockaddr_in6>()
+        }
+    };
+    (storage, len as libc::socklen_t)
+}
+
 /// UDP DNS Tunnel Client
 pub struct DnsUdpTunnelClient {
     server_addr: SocketAddr,
@@ -453,12 +709,13 @@ impl DnsUdpTunnelClient {
                 .map_err(|e| format!("Failed to receive DNS response: {}", e))?;
 
             let response_packet = &buf[..len];
-            let response_payload = parse_dns_response(response_packet)
+            let mut response_payload = parse_dns_response(response_packet)
                 .map_err(|e| format!("Failed to parse DNS response: {}", e))?;
 
             // Decode tunnel header
             let header = DnsTunnelHeader::decode(&response_payload)?;
-            let fragment_data = response_payload[DnsTunnelHeader::SIZE..].to_vec();
+            response_payload.drain(..DnsTunnelHeader::SIZE);
+            let fragment_data = response_payload;
 
             if header.session_id != self.session_id {
                 log::warn!(
@@ -619,10 +876,11 @@ impl DnsUdpTunnelClientPipelined {
 
         // Wait for response with timeout
         match tokio::time::timeout(Duration::from_secs(5), rx).await {
-            Ok(Ok(response_payload)) => {
+            Ok(Ok(mut response_payload)) => {
                 // Reassemble if needed (for now, assume single fragment response)
                 if response_payload.len() > DnsTunnelHeader::SIZE {
-                    Ok(response_payload[DnsTunnelHeader::SIZE..].to_vec())
+                    response_payload.drain(..DnsTunnelHeader::SIZE);
+                    Ok(response_payload)
                 } else {
                     Ok(Vec::new())
                 }
@@ -693,4 +951,87 @@ mod tests {
 
         assert_eq!(reassembled, payload);
     }
+
+    #[test]
+    fn test_session_fragment_bounds() {
+        let (tx, _rx) = mpsc::unbounded_channel();
+        let mut session = TunnelSession::new("127.0.0.1:5353".parse().unwrap(), None, 0x1234, tx);
+        let fragment = |seq_num, total_fragments, data: &[u8]| Fragment {
+            seq_num,
+            total_fragments,
+            data: data.to_vec(),
+            received_at: Instant::now(),
+        };
+
+        // Oversized fragment counts and out-of-range sequence numbers are dropped
+        assert!(session.add_fragment(fragment(0, u16::MAX, b"x")).is_none());
+        assert!(session.add_fragment(fragment(3, 2, b"x")).is_none());
+        assert!(session.fragments.is_empty());
+
+        // A new packet replaces an abandoned partial one
+        assert!(session.add_fragment(fragment(0, 3, b"stale")).is_none());
+        assert!(session.add_fragment(fragment(1, 2, b"lo")).is_none());
+        assert_eq!(session.add_fragment(fragment(0, 2, b"hel")).unwrap(), b"hello");
+    }
+
+    #[cfg(target_os = "linux")]
+    #[tokio::test]
+    async fn test_mmsg_batch_round_trip() {
+        let server = UdpSocket::bind("127.0.0.1:0").await.unwrap();
+        let client = UdpSocket::bind("127.0.0.1:0").await.unwrap();
+        let client_addr = client.local_addr().unwrap();
+
+        let packets: Vec<Vec<u8>> = (0..5u8).map(|i| vec![i; 10 + i as usize]).collect();
+        let sent = send_batch(client.as_raw_fd(), &packets, server.local_addr().unwrap()).unwrap();
+        assert_eq!(sent, packets.len());
+
+        let mut bufs = vec![vec![0u8; MAX_UDP_PACKET_SIZE]; RECV_BATCH_SIZE];
+        let mut received = Vec::new();
+        while received.len() < packets.len() {
+            server.readable().await.unwrap();
+            let mut batch = Vec::new();
+            match server.try_io(Interest::READABLE, || recv_batch(server.as_raw_fd(), &mut bufs, &mut batch)) {
+                Ok(()) => received.extend(batch.iter().map(|&(slot, len, addr)| (bufs[slot][..len].to_vec(), addr))),
+                Err(e) if e.kind() == std::io::ErrorKind::WouldBlock => {}
+                Err(e) => panic!("recv_batch failed: {}", e),
+            }
+        }
+
+        for (packet, (data, addr)) in packets.iter().zip(&received) {
+            assert_eq!(packet, data);
+            assert_eq!(*addr, client_addr);
+        }
+    }
+
+    #[tokio::test]
+    async fn test_send_dns_response_fragments() {
+        let server = Arc::new(UdpSocket::bind("127.0.0.1:0").await.unwrap());
+        let client = UdpSocket::bind("127.0.0.1:0").await.unwrap();
+        let payload: Vec<u8> = (0..400u16).map(|i| i as u8).collect();
+
+        DnsUdpTunnelServer::send_dns_response(
+            server,
+            client.local_addr().unwrap(),
+            0x4242,
+            0x1234,
+            payload.clone(),
+        )
+        .await
+        .unwrap();
+
+        let mut reassembled = Vec::new();
+        let mut buf = vec![0u8; MAX_UDP_PACKET_SIZE];
+        for expected_seq in 0..3 {
+            let len = client.recv(&mut buf).await.unwrap();
+            assert_eq!(&buf[..2], &[0x42, 0x42]);
+            let data = parse_dns_response(&buf[..len]).unwrap();
+            let header = DnsTunnelHeader::decode(&data).unwrap();
+
+            assert_eq!(header.session_id, 0x1234);
+            assert_eq!(header.seq_num, expected_seq);
+            assert_eq!(header.total_fragments, 3);
+            reassembled.extend_from_slice(&data[DnsTunnelHeader::SIZE..]);
+        }
+        assert_eq!(reassembled, payload);
+    }
 }
@@ -4,7 +4,10 @@
 //! with jq and other JSON tools for analysis and monitoring.
 
 use serde::{Deserialize, Serialize};
-use std::time::SystemTime;
+use std::cell::RefCell;
+use std::fmt::Write as _;
+use std::io::Write;
+use std::time::{SystemTime, UNIX_EPOCH};
 
 /// Log level
 #[derive(Debug, Clone, Copy, PartialEq, Eq, Serialize, Deserialize)]
@@ -27,6 +30,40 @@ impl std::fmt::Display for LogLevel {
     }
 }
 
+thread_local! {
+    /// Date and time-of-day part of the last timestamp formatted on this thread;
+    /// entries logged within the same second reuse it
+    static TIMESTAMP_CACHE: RefCell<(u64, String)> = RefCell::new((u64::MAX, String::new()));
+}
+
+/// Format like `humantime::format_rfc3339`, redoing the calendar math only
+/// when the second changes and just appending the fraction otherwise
+fn format_timestamp(time: SystemTime) -> String {
+    let since_epoch = match time.duration_since(UNIX_EPOCH) {
+        Ok(d) => d,
+        Err(_) => return humantime::format_rfc3339(time).to_string(),
+    };
+    let secs = since_epoch.as_secs();
+    let nanos = since_epoch.subsec_nanos();
+
+    TIMESTAMP_CACHE.with(|cache| {
+        let mut cache = cache.borrow_mut();
+        if cache.0 != secs {
+            let mut prefix = humantime::format_rfc3339_seconds(time).to_string();
+            prefix.pop(); // trailing 'Z'
+            *cache = (secs, prefix);
+        }
+
+        let mut timestamp = String::with_capacity(cache.1.len() + 11);
+        timestamp.push_str(&cache.1);
+        if nanos != 0 {
+            let _ = write!(timestamp, ".{:09}", nanos);
+        }
+        timestamp.push('Z');
+        timestamp
+    })
+}
+
 /// Structured log entry
 #[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct LogEntry {
@@ -55,7 +92,7 @@ impl LogEntry {
         message: impl Into<String>,
     ) -> Self {
         Self {
-            timestamp: humantime::format_rfc3339(SystemTime::now()).to_string(),
+            timestamp: format_timestamp(SystemTime::now()),
             level,
             component: component.into(),
             message: message.into(),
@@ -83,9 +120,13 @@ impl LogEntry {
 
     /// Output as JSON line
     pub fn emit(&self) {
-        if let Ok(json) = serde_json::to_string(self) {
-            println!("{}", json);
-        }
+        let _ = self.write_line(std::io::stdout().lock());
+    }
+
+    /// Serialize as a JSON line straight into `out`, without an intermediate String
+    pub fn write_line<W: Write>(&self, mut out: W) -> std::io::Result<()> {
+        serde_json::to_writer(&mut out, self)?;
+        out.write_all(b"\n")
     }
 }
 
@@ -371,4 +412,28 @@ mod tests {
         assert!(json.contains("\"component\":\"network\""));
         assert!(json.contains("\"port\":443"));
     }
+
+    #[test]
+    fn test_cached_timestamp() {
+        let base = UNIX_EPOCH + std::time::Duration::from_secs(1_700_000_000);
+        for offset_ns in [0, 1, 123_456_789, 999_999_999, 1_000_000_000, 1_000_000_500] {
+            let time = base + std::time::Duration::from_nanos(offset_ns);
+            assert_eq!(format_timestamp(time), humantime::format_rfc3339(time).to_string());
+        }
+    }
+
+    #[test]
+    fn test_write_line() {
+        let entry = LogEntry::new(LogLevel::Info, "test", "quote \" and, comma")
+            .add_field("port", serde_json::json!(53));
+
+        let mut out = Vec::new();
+        entry.write_line(&mut out).unwrap();
+        entry.write_line(&mut out).unwrap();
+
+        let text = String::from_utf8(out).unwrap();
+        let lines: Vec<&str> = text.lines().collect();
+        assert_eq!(lines.len(), 2);
+        assert_eq!(lines[0], serde_json::to_string(&entry).unwrap());
+    }
 }
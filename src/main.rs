@@ -509,6 +509,11 @@ async fn handle_udp_tunnel_connection(
 
     log::debug!("New SOCKS5 connection from {} for UDP tunnel", client_addr);
 
+    // SOCKS replies are tiny; don't let Nagle delay them
+    if let Err(e) = client.set_nodelay(true) {
+        log::debug!("Failed to set TCP_NODELAY for {}: {}", client_addr, e);
+    }
+
     // SOCKS5 handshake
     let mut buf = [0u8; 256];
 
@@ -547,16 +552,9 @@ async fn handle_udp_tunnel_connection(
         0x04 => {
             // IPv6
             client.read_exact(&mut buf[..16]).await?;
-            let ip = std::net::Ipv6Addr::new(
-                u16::from_be_bytes([buf[0], buf[1]]),
-                u16::from_be_bytes([buf[2], buf[3]]),
-                u16::from_be_bytes([buf[4], buf[5]]),
-                u16::from_be_bytes([buf[6], buf[7]]),
-                u16::from_be_bytes([buf[8], buf[9]]),
-                u16::from_be_bytes([buf[10], buf[11]]),
-                u16::from_be_bytes([buf[12], buf[13]]),
-                u16::from_be_bytes([buf[14], buf[15]]),
-            );
+            let mut octets = [0u8; 16];
+            octets.copy_from_slice(&buf[..16]);
+            let ip = std::net::Ipv6Addr::from(octets);
             format!("{}", ip)
         }
         _ => anyhow::bail!("Unsupported address type: {}", addr_type),
@@ -754,16 +752,32 @@ async fn run_server(
         let bind_addr: std::net::SocketAddr = bind_addr.parse()?;
         let udp_server = DnsUdpTunnelServer::new(bind_addr);
 
-        // Session map: session_id -> (target TCP stream, read buffer)
+        // Session map: session_id -> target TCP stream. Each stream has its own
+        // lock so target I/O never holds the map lock and sessions don't block
+        // each other.
         use std::collections::HashMap;
         use std::sync::Arc;
-        use tokio::sync::RwLock;
+        use tokio::sync::{Mutex, RwLock};
         use tokio::net::TcpStream;
         use tokio::io::{AsyncReadExt, AsyncWriteExt};
 
-        type SessionMap = Arc<RwLock<HashMap<u16, TcpStream>>>;
+        type SessionStream = Arc<Mutex<TcpStream>>;
+        type SessionMap = Arc<RwLock<HashMap<u16, SessionStream>>>;
         let sessions: SessionMap = Arc::new(RwLock::new(HashMap::new()));
 
+        // Look up a session's stream, holding the map lock only for the clone
+        async fn session_stream(sessions: &SessionMap, session_id: u16) -> Option<SessionStream> {
+            sessions.read().await.get(&session_id).cloned()
+        }
+
+        // Drop a session, unless a newer CONNECT has already replaced its stream
+        async fn remove_session(sessions: &SessionMap, session_id: u16, stream: &SessionStream) {
+            let mut sessions_lock = sessions.write().await;
+            if sessions_lock.get(&session_id).map_or(false, |s| Arc::ptr_eq(s, stream)) {
+                sessions_lock.remove(&session_id);
+            }
+        }
+
         // Handler for UDP DNS tunnel packets
         // Protocol:
         // - CONNECT (0x01): [cmd:1][addr_type:1][addr_len:1][addr:var][port:2]
@@ -819,16 +833,9 @@ async fn run_server(
                                 if payload.len() < 20 {
                                     return Ok(vec![0x01, 0x01]);
                                 }
-                                let ip = std::net::Ipv6Addr::new(
-                                    u16::from_be_bytes([payload[2], payload[3]]),
-                                    u16::from_be_bytes([payload[4], payload[5]]),
-                                    u16::from_be_bytes([payload[6], payload[7]]),
-                                    u16::from_be_bytes([payload[8], payload[9]]),
-                                    u16::from_be_bytes([payload[10], payload[11]]),
-                                    u16::from_be_bytes([payload[12], payload[13]]),
-                                    u16::from_be_bytes([payload[14], payload[15]]),
-                                    u16::from_be_bytes([payload[16], payload[17]]),
-                                );
+                                let mut octets = [0u8; 16];
+                                octets.copy_from_slice(&payload[2..18]);
+                                let ip = std::net::Ipv6Addr::from(octets);
                                 let port = u16::from_be_bytes([payload[18], payload[19]]);
                                 (format!("[{}]:{}", ip, port), port)
                             }
@@ -843,9 +850,7 @@ async fn run_server(
                         match TcpStream::connect(&target_addr).await {
                             Ok(stream) => {
                                 // Store the connection
-                                let mut sessions_lock = sessions.write().await;
-                                sessions_lock.insert(session_id, stream);
-                                drop(sessions_lock);
+                                sessions.write().await.insert(session_id, Arc::new(Mutex::new(stream)));
                                 log::info!("UDP session {:04x} connected to {}", session_id, target_addr);
                                 Ok(vec![0x00]) // Success
                             }
@@ -859,35 +864,38 @@ async fn run_server(
                         // DATA command
                         let data = &payload[1..];
 
-                        let mut sessions_lock = sessions.write().await;
-                        if let Some(stream) = sessions_lock.get_mut(&session_id) {
+                        if let Some(session) = session_stream(&sessions, session_id).await {
+                            let mut stream = session.lock().await;
+
                             // Write data to target
                             if let Err(e) = stream.write_all(data).await {
                                 log::error!("UDP session {:04x} write error: {}", session_id, e);
-                                sessions_lock.remove(&session_id);
+                                drop(stream);
+                                remove_session(&sessions, session_id, &session).await;
                                 return Ok(vec![0x01, 0x04]); // Error: connection closed
                             }
 
-                            // Read available response with short timeout
-                            let mut response_buf = vec![0u8; 65536];
+                            // Read available response with short timeout, straight into
+                            // the response after its status byte (no zeroed scratch buffer)
+                            let mut response = Vec::with_capacity(1 + 65536);
+                            response.push(0x00); // Success prefix
                             let read_result = tokio::time::timeout(
                                 std::time::Duration::from_millis(100),
-                                stream.read(&mut response_buf)
+                                stream.read_buf(&mut response)
                             ).await;
+                            drop(stream);
 
-                            let mut response = vec![0x00]; // Success prefix
                             match read_result {
                                 Ok(Ok(0)) => {
                                     // Connection closed by target
-                                    sessions_lock.remove(&session_id);
+                                    remove_session(&sessions, session_id, &session).await;
                                 }
-                                Ok(Ok(n)) => {
-                                    // Got data from target
-                                    response.extend_from_slice(&response_buf[..n]);
+                                Ok(Ok(_)) => {
+                                    // Got data from target (already in response)
                                 }
                                 Ok(Err(e)) => {
                                     log::debug!("UDP session {:04x} read error: {}", session_id, e);
-                                    sessions_lock.remove(&session_id);
+                                    remove_session(&sessions, session_id, &session).await;
                                 }
                                 Err(_) => {
                                     // Timeout - no data available, that's OK
@@ -902,30 +910,32 @@ async fn run_server(
                     0x03 => {
                         // POLL command - retrieve any buffered data from server without sending
                         // This is essential for DNS tunneling since server can't push data
-                        let mut sessions_lock = sessions.write().await;
-                        if let Some(stream) = sessions_lock.get_mut(&session_id) {
-                            // Read available response with short timeout
-                            let mut response_buf = vec![0u8; 65536];
+                        if let Some(session) = session_stream(&sessions, session_id).await {
+                            let mut stream = session.lock().await;
+
+                            // Read available response with short timeout, straight into
+                            // the response after its status byte (no zeroed scratch buffer)
+                            let mut response = Vec::with_capacity(1 + 65536);
+                            response.push(0x00); // Success prefix
                             let read_result = tokio::time::timeout(
                                 std::time::Duration::from_millis(100),
-                                stream.read(&mut response_buf)
+                                stream.read_buf(&mut response)
                             ).await;
+                            drop(stream);
 
-                            let mut response = vec![0x00]; // Success prefix
                             match read_result {
                                 Ok(Ok(0)) => {
                                     // Connection closed by target
                                     log::debug!("UDP session {:04x} POLL: connection closed", session_id);
-                                    sessions_lock.remove(&session_id);
+                                    remove_session(&sessions, session_id, &session).await;
                                 }
                                 Ok(Ok(n)) => {
-                                    // Got data from target
+                                    // Got data from target (already in response)
                                     log::debug!("UDP session {:04x} POLL: {} bytes available", session_id, n);
-                                    response.extend_from_slice(&response_buf[..n]);
                                 }
                                 Ok(Err(e)) => {
                                     log::debug!("UDP session {:04x} POLL read error: {}", session_id, e);
-                                    sessions_lock.remove(&session_id);
+                                    remove_session(&sessions, session_id, &session).await;
                                 }
                                 Err(_) => {
                                     // Timeout - no data available, that's OK
@@ -1032,6 +1042,11 @@ async fn handle_tunnel_connection(
     let noise_config = noise_config
         .ok_or_else(|| anyhow::anyhow!("Server not configured for encrypted tunnels"))?;
 
+    // Enable TCP_NODELAY so small framed replies aren't held back by Nagle
+    if let Err(e) = tunnel_stream.set_nodelay(true) {
+        log::debug!("Failed to set TCP_NODELAY for {}: {}", peer_addr, e);
+    }
+
     log::debug!("Performing Noise handshake with {} using protocol {}", peer_addr, protocol_id.as_str());
 
     // Create protocol wrapper for handshake wrapping
@@ -1535,8 +1550,15 @@ async fn test_all_paths(server: &str, format: &str, protocol_dir: &PathBuf) -> R
     let tester = nooshdaroo::PathTester::new(library);
     let config = nooshdaroo::MultiPortConfig::default();
 
+    // Resolve the host once; every probe reuses the same address
+    let server_ip = tokio::net::lookup_host((server, 0))
+        .await?
+        .next()
+        .ok_or_else(|| anyhow::anyhow!("Could not resolve {}", server))?
+        .ip();
+
     // Run tests
-    let results = tester.test_all_paths(server, &config).await;
+    let results = tester.test_all_paths(&server_ip.to_string(), &config).await;
 
     if results.is_empty() {
         warn!("No successful paths found!");
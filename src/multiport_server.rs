@@ -10,8 +10,10 @@ use crate::netflow_evasion::MultiPortConfig;
 use crate::protocol::{ProtocolId, ProtocolMeta};
 use std::collections::HashMap;
 use std::net::SocketAddr;
+use std::sync::atomic::{AtomicU64, Ordering};
 use std::sync::Arc;
-use tokio::net::TcpListener;
+use std::time::{Duration, Instant};
+use tokio::net::{TcpListener, TcpSocket};
 use tokio::sync::RwLock;
 
 /// Port binding information
@@ -40,7 +42,7 @@ pub struct MultiPortServer {
     port_protocols: Arc<RwLock<HashMap<u16, Vec<ProtocolId>>>>,
 
     /// Connection statistics per port
-    stats: Arc<RwLock<HashMap<u16, PortStats>>>,
+    stats: Arc<RwLock<HashMap<u16, Arc<PortCounters>>>>,
 }
 
 /// Statistics for a port
@@ -56,6 +58,50 @@ pub struct PortStats {
     pub last_connection: Option<std::time::Instant>,
 }
 
+/// Live counters for one port, updated without locking from every acceptor
+#[derive(Debug)]
+struct PortCounters {
+    connections: AtomicU64,
+    bytes: AtomicU64,
+    failures: AtomicU64,
+    /// Nanoseconds since `created` of the last connection, plus one (0 = none)
+    last_connection: AtomicU64,
+    created: Instant,
+}
+
+impl PortCounters {
+    fn new() -> Self {
+        Self {
+            connections: AtomicU64::new(0),
+            bytes: AtomicU64::new(0),
+            failures: AtomicU64::new(0),
+            last_connection: AtomicU64::new(0),
+            created: Instant::now(),
+        }
+    }
+
+    fn record_connection(&self) {
+        self.connections.fetch_add(1, Ordering::Relaxed);
+        let since = self.created.elapsed().as_nanos() as u64;
+        self.last_connection.store(since + 1, Ordering::Relaxed);
+    }
+
+    fn record_failure(&self) {
+        self.failures.fetch_add(1, Ordering::Relaxed);
+    }
+
+    fn snapshot(&self) -> PortStats {
+        let last = self.last_connection.load(Ordering::Relaxed);
+        PortStats {
+            connections: self.connections.load(Ordering::Relaxed),
+            bytes: self.bytes.load(Ordering::Relaxed),
+            failures: self.failures.load(Ordering::Relaxed),
+            last_connection: (last > 0)
+                .then(|| self.created + Duration::from_nanos(last - 1)),
+        }
+    }
+}
+
 impl MultiPortServer {
     /// Create a new multi-port server
     pub fn new(library: Arc<ProtocolLibrary>, config: MultiPortConfig) -> Self {
@@ -152,7 +198,13 @@ impl MultiPortServer {
         let mut tasks = Vec::new();
 
         for binding in bindings {
-            let stats = Arc::clone(&self.stats);
+            let stats = Arc::clone(
+                self.stats
+                    .write()
+                    .await
+                    .entry(binding.port)
+                    .or_insert_with(|| Arc::new(PortCounters::new())),
+            );
             let port_protocols = Arc::clone(&self.port_protocols);
 
             let task = tokio::spawn(async move {
@@ -173,31 +225,115 @@ impl MultiPortServer {
     }
 
     /// Listen on a single port
+    ///
+    /// On Linux, binds one SO_REUSEPORT listener per CPU core so the kernel
+    /// spreads incoming connections across acceptors instead of a single
+    /// accept queue.
     async fn listen_on_port(
         binding: PortBinding,
         port_protocols: Arc<RwLock<HashMap<u16, Vec<ProtocolId>>>>,
-        stats: Arc<RwLock<HashMap<u16, PortStats>>>,
+        stats: Arc<PortCounters>,
     ) -> Result<(), Box<dyn std::error::Error>> {
-        let listener = TcpListener::bind(binding.bind_addr).await?;
+        let acceptors = Self::acceptor_count();
+        Self::ensure_port_free(binding.bind_addr)?;
+        let mut listeners = Vec::with_capacity(acceptors);
+        for _ in 0..acceptors {
+            listeners.push(Self::bind_reuseport(binding.bind_addr)?);
+        }
+
         log::info!(
-            "Listening on port {} for protocols: {:?}",
+            "Listening on port {} for protocols: {:?} ({} acceptors)",
             binding.port,
-            binding.protocols
+            binding.protocols,
+            acceptors
         );
 
+        let tasks: Vec<_> = listeners
+            .into_iter()
+            .map(|listener| {
+                tokio::spawn(Self::accept_loop(
+                    listener,
+                    binding.clone(),
+                    Arc::clone(&port_protocols),
+                    Arc::clone(&stats),
+                ))
+            })
+            .collect();
+
+        for task in tasks {
+            let _ = task.await;
+        }
+
+        Ok(())
+    }
+
+    /// Number of listeners to bind per port
+    fn acceptor_count() -> usize {
+        // Other kernels accept SO_REUSEPORT but don't load-balance across
+        // the sockets, so extra acceptors would sit idle there
+        if cfg!(target_os = "linux") {
+            std::thread::available_parallelism()
+                .map(|n| n.get())
+                .unwrap_or(1)
+        } else {
+            1
+        }
+    }
+
+    /// Fail with `AddrInUse` if anything already holds `addr`
+    ///
+    /// SO_REUSEPORT would otherwise let a second server on the same ports
+    /// (run by the same user) bind quietly and take a share of the
+    /// connections, so probe with a plain socket before binding acceptors.
+    fn ensure_port_free(addr: SocketAddr) -> std::io::Result<()> {
+        let socket = if addr.is_ipv4() {
+            TcpSocket::new_v4()?
+        } else {
+            TcpSocket::new_v6()?
+        };
+        // As in bind_reuseport, SO_REUSEADDR is Unix-only
+        #[cfg(unix)]
+        socket.set_reuseaddr(true)?;
+        socket.bind(addr)
+    }
+
+    /// Bind a TCP listener that can share its port with sibling acceptors
+    fn bind_reuseport(addr: SocketAddr) -> std::io::Result<TcpListener> {
+        let socket = if addr.is_ipv4() {
+            TcpSocket::new_v4()?
+        } else {
+            TcpSocket::new_v6()?
+        };
+        // Only on Unix, matching TcpListener::bind; on Windows SO_REUSEADDR
+        // lets a socket take over a port another process is listening on
+        #[cfg(unix)]
+        socket.set_reuseaddr(true)?;
+        #[cfg(target_os = "linux")]
+        socket.set_reuseport(true)?;
+        socket.bind(addr)?;
+        socket.listen(1024)
+    }
+
+    /// Accept connections from one listener
+    async fn accept_loop(
+        listener: TcpListener,
+        binding: PortBinding,
+        port_protocols: Arc<RwLock<HashMap<u16, Vec<ProtocolId>>>>,
+        stats: Arc<PortCounters>,
+    ) {
         loop {
             match listener.accept().await {
                 Ok((socket, peer_addr)) => {
                     log::debug!("Connection on port {} from {}", binding.port, peer_addr);
 
-                    // Update stats
-                    {
-                        let mut stats_map = stats.write().await;
-                        let port_stats = stats_map.entry(binding.port).or_default();
-                        port_stats.connections += 1;
-                        port_stats.last_connection = Some(std::time::Instant::now());
+                    // Emulated protocols are request/response; avoid Nagle delays
+                    if let Err(e) = socket.set_nodelay(true) {
+                        log::debug!("Failed to set TCP_NODELAY on port {}: {}", binding.port, e);
                     }
 
+                    // Update stats
+                    stats.record_connection();
+
                     // Get protocol for this port
                     let protocols = {
                         let map = port_protocols.read().await;
@@ -218,9 +354,7 @@ impl MultiPortServer {
                             log::error!("Connection handler error on port {}: {}", port, error_msg);
 
                             // Update failure stats
-                            let mut stats_map = stats_clone.write().await;
-                            let port_stats = stats_map.entry(port).or_default();
-                            port_stats.failures += 1;
+                            stats_clone.record_failure();
                         }
                     });
                 }
@@ -228,9 +362,7 @@ impl MultiPortServer {
                     log::error!("Accept error on port {}: {}", binding.port, e);
 
                     // Update failure stats
-                    let mut stats_map = stats.write().await;
-                    let port_stats = stats_map.entry(binding.port).or_default();
-                    port_stats.failures += 1;
+                    stats.record_failure();
                 }
             }
         }
@@ -287,7 +419,12 @@ impl MultiPortServer {
 
     /// Get statistics for all ports
     pub async fn get_stats(&self) -> HashMap<u16, PortStats> {
-        self.stats.read().await.clone()
+        self.stats
+            .read()
+            .await
+            .iter()
+            .map(|(port, counters)| (*port, counters.snapshot()))
+            .collect()
     }
 }
 
@@ -314,4 +451,34 @@ mod tests {
             assert!(port >= 1024);
         }
     }
+
+    #[cfg(target_os = "linux")]
+    #[tokio::test]
+    async fn test_reuseport_acceptors_share_port() {
+        let first = MultiPortServer::bind_reuseport("127.0.0.1:0".parse().unwrap()).unwrap();
+        let addr = first.local_addr().unwrap();
+
+        // Sibling acceptors share the port...
+        let second = MultiPortServer::bind_reuseport(addr).unwrap();
+        assert_eq!(second.local_addr().unwrap(), addr);
+
+        // ...but a port already in use is reported before they bind
+        let err = MultiPortServer::ensure_port_free(addr).unwrap_err();
+        assert_eq!(err.kind(), std::io::ErrorKind::AddrInUse);
+    }
+
+    #[test]
+    fn test_port_counters_snapshot() {
+        let counters = PortCounters::new();
+        assert!(counters.snapshot().last_connection.is_none());
+
+        counters.record_connection();
+        counters.record_connection();
+        counters.record_failure();
+
+        let stats = counters.snapshot();
+        assert_eq!(stats.connections, 2);
+        assert_eq!(stats.failures, 1);
+        assert!(stats.last_connection.unwrap() <= Instant::now());
+    }
 }
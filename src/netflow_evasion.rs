@@ -9,9 +9,10 @@
 
 use crate::protocol::{ProtocolId, ProtocolMeta, Transport};
 use crate::library::ProtocolLibrary;
+use futures::stream::{self, StreamExt};
 use serde::{Deserialize, Serialize};
 use std::collections::HashMap;
-use std::net::SocketAddr;
+use std::net::{IpAddr, SocketAddr};
 use std::sync::Arc;
 use std::time::{Duration, Instant};
 use tokio::net::TcpStream;
@@ -211,6 +212,13 @@ impl ProtocolMixer {
     }
 }
 
+/// Paths probed at once by `PathTester::test_all_paths`; kept small so testing
+/// doesn't look like a port scan or distort the latencies it measures
+const MAX_CONCURRENT_PATH_TESTS: usize = 4;
+
+/// Delay between successive probes of the same path
+const PROBE_INTERVAL: Duration = Duration::from_millis(100);
+
 /// Path tester for multi-protocol connections
 pub struct PathTester {
     /// Protocol library
@@ -239,25 +247,21 @@ impl PathTester {
         protocol: &ProtocolMeta,
     ) -> PathTestResult {
         let mut latencies = Vec::new();
-        let mut successes = 0;
 
-        for _ in 0..self.test_iterations {
-            let start = Instant::now();
-
-            match timeout(
-                Duration::from_millis(self.timeout_ms),
-                TcpStream::connect(addr)
-            ).await {
-                Ok(Ok(_stream)) => {
-                    latencies.push(start.elapsed());
-                    successes += 1;
-                }
-                _ => {}
+        for i in 0..self.test_iterations {
+            // Space out probes of the same path, but don't wait after the last
+            if i > 0 {
+                tokio::time::sleep(PROBE_INTERVAL).await;
             }
 
-            // Small delay between tests
-            tokio::time::sleep(Duration::from_millis(100)).await;
+            let start = Instant::now();
+            if let Ok(Ok(_stream)) =
+                timeout(Duration::from_millis(self.timeout_ms), TcpStream::connect(addr)).await
+            {
+                latencies.push(start.elapsed());
+            }
         }
+        let successes = latencies.len();
 
         let success = successes > 0;
         let avg_latency = if latencies.is_empty() {
@@ -288,26 +292,44 @@ impl PathTester {
         server_host: &str,
         config: &MultiPortConfig,
     ) -> Vec<PathTestResult> {
-        let mut results = Vec::new();
-
-        // Test standard protocol ports from loaded protocols
-        if config.use_standard_ports {
-            for protocol in self.library.all() {
-                let port = protocol.default_port;
-                if port == 0 {
-                    continue;
-                }
+        // Only a few paths are in flight at a time; iterations within a path
+        // stay sequential
+        let mut results: Vec<PathTestResult> = stream::iter(self.path_targets(server_host, config))
+            .map(|(addr, protocol)| self.test_path(addr, protocol))
+            .buffer_unordered(MAX_CONCURRENT_PATH_TESTS)
+            .collect()
+            .await;
+
+        sort_by_score(&mut results);
+        results
+    }
 
-                if let Ok(addr) = format!("{}:{}", server_host, port).parse::<SocketAddr>() {
-                    let result = self.test_path(addr, protocol).await;
-                    results.push(result);
-                }
+    /// Addresses to probe for `test_all_paths`, one per protocol standard port
+    fn path_targets(
+        &self,
+        server_host: &str,
+        config: &MultiPortConfig,
+    ) -> Vec<(SocketAddr, &ProtocolMeta)> {
+        // Parse the host once and build each probe address from it; callers
+        // pass an already-resolved IP, so no per-port lookup is needed
+        let ip = match server_host.parse::<IpAddr>() {
+            Ok(ip) => ip,
+            Err(_) => {
+                log::warn!("Path testing needs an IP address, got {}", server_host);
+                return Vec::new();
             }
+        };
+
+        if !config.use_standard_ports {
+            return Vec::new();
         }
 
-        // Sort by score (best first)
-        results.sort_by(|a, b| b.score().partial_cmp(&a.score()).unwrap());
-        results
+        self.library
+            .all()
+            .into_iter()
+            .filter(|protocol| protocol.default_port != 0)
+            .map(|protocol| (SocketAddr::new(ip, protocol.default_port), protocol))
+            .collect()
     }
 
     /// Calculate detection risk for a protocol on a given port
@@ -371,6 +393,11 @@ pub fn build_mixer_from_results(
     mixer
 }
 
+/// Sort path test results best first
+fn sort_by_score(results: &mut [PathTestResult]) {
+    results.sort_by(|a, b| b.score().partial_cmp(&a.score()).unwrap());
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -392,6 +419,45 @@ mod tests {
         assert!(score <= 1.0);
     }
 
+    #[test]
+    fn test_path_targets() {
+        let library = Arc::new(ProtocolLibrary::load(std::path::Path::new("/nonexistent")).unwrap());
+        let tester = PathTester::new(library);
+        let config = MultiPortConfig::default();
+
+        let targets = tester.path_targets("::1", &config);
+        assert!(!targets.is_empty());
+        for (addr, protocol) in &targets {
+            assert_eq!(addr.ip(), "::1".parse::<IpAddr>().unwrap());
+            assert_eq!(addr.port(), protocol.default_port);
+            assert_ne!(addr.port(), 0);
+        }
+
+        // Hostnames must be resolved by the caller
+        assert!(tester.path_targets("example.com", &config).is_empty());
+
+        let config = MultiPortConfig { use_standard_ports: false, ..Default::default() };
+        assert!(tester.path_targets("127.0.0.1", &config).is_empty());
+    }
+
+    #[test]
+    fn test_results_sorted_by_score() {
+        let result = |port: u16, success: bool| PathTestResult {
+            addr: SocketAddr::new("127.0.0.1".parse().unwrap(), port),
+            protocol: ProtocolId::from("https"),
+            latency: Duration::from_millis(50),
+            success,
+            packet_loss: if success { 0.0 } else { 1.0 },
+            throughput: if success { 1_000_000 } else { 0 },
+            detection_risk: 0.2,
+        };
+
+        let mut results = vec![result(1, false), result(2, true), result(3, false)];
+        sort_by_score(&mut results);
+        assert_eq!(results[0].addr.port(), 2);
+        assert!(results.windows(2).all(|w| w[0].score() >= w[1].score()));
+    }
+
     #[test]
     fn test_mixer_selection() {
         let mut mixer = ProtocolMixer {
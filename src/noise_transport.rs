@@ -9,6 +9,7 @@
 
 use anyhow::{anyhow, Result};
 use base64::{engine::general_purpose::STANDARD as BASE64, Engine};
+use bytes::{Buf, BytesMut};
 use serde::{Deserialize, Serialize};
 use snow::{params::NoiseParams, Builder, HandshakeState, TransportState};
 use std::io;
@@ -17,6 +18,12 @@ use tokio::io::{AsyncRead, AsyncReadExt, AsyncWrite, AsyncWriteExt};
 /// Maximum message size for Noise protocol (64 KB)
 const MAX_MESSAGE_SIZE: usize = 65535;
 
+/// Receive buffer size for framed reads (one full frame plus its length prefix)
+const RX_BUFFER_SIZE: usize = MAX_MESSAGE_SIZE + 2;
+
+/// Encrypt buffer size: length prefix headroom, largest message, AEAD tag
+const WRITE_BUFFER_SIZE: usize = 2 + MAX_MESSAGE_SIZE + 16;
+
 /// Noise protocol pattern
 #[derive(Debug, Clone, Copy, PartialEq, Eq, Serialize, Deserialize)]
 #[serde(rename_all = "lowercase")]
@@ -209,6 +216,9 @@ pub struct NoiseTransport {
     read_buffer: Vec<u8>,
     write_buffer: Vec<u8>,
 
+    /// Bytes read from the stream but not yet consumed as a frame
+    rx_buffer: BytesMut,
+
     /// Optional TLS record layer for full session emulation
     tls_layer: Option<crate::tls_record_layer::TlsRecordLayer>,
 }
@@ -259,7 +269,8 @@ impl NoiseTransport {
         Ok(Self {
             transport,
             read_buffer: vec![0u8; MAX_MESSAGE_SIZE],
-            write_buffer: vec![0u8; MAX_MESSAGE_SIZE + 16], // +16 for AEAD tag
+            write_buffer: vec![0u8; WRITE_BUFFER_SIZE],
+            rx_buffer: BytesMut::with_capacity(RX_BUFFER_SIZE),
             tls_layer: None, // TLS wrapping disabled by default
         })
     }
@@ -309,7 +320,8 @@ impl NoiseTransport {
         Ok(Self {
             transport,
             read_buffer: vec![0u8; MAX_MESSAGE_SIZE],
-            write_buffer: vec![0u8; MAX_MESSAGE_SIZE + 16],
+            write_buffer: vec![0u8; WRITE_BUFFER_SIZE],
+            rx_buffer: BytesMut::with_capacity(RX_BUFFER_SIZE),
             tls_layer: None, // TLS wrapping disabled by default
         })
     }
@@ -501,17 +513,18 @@ impl NoiseTransport {
         S: AsyncRead + Unpin,
     {
         // If TLS wrapping is enabled, unwrap TLS Application Data record first
-        let encrypted = if let Some(ref tls) = self.tls_layer {
+        let len = if let Some(ref tls) = self.tls_layer {
             // Read and unwrap TLS record
-            tls.read_application_data(stream).await
-                .map_err(|e| anyhow!("Failed to read TLS record: {}", e))?
+            let encrypted = tls.read_application_data(stream).await
+                .map_err(|e| anyhow!("Failed to read TLS record: {}", e))?;
+            self.transport.read_message(&encrypted, &mut self.write_buffer)?
         } else {
             // Read length-prefixed message as before
-            Self::read_message(stream, &mut self.read_buffer).await?.to_vec()
+            let encrypted = self.read_frame(stream).await?;
+            self.transport.read_message(&encrypted, &mut self.write_buffer)?
         };
 
-        // Decrypt Noise payload
-        let len = self.transport.read_message(&encrypted, &mut self.write_buffer)?;
+        // Decrypted Noise payload
         Ok(self.write_buffer[..len].to_vec())
     }
 
@@ -524,17 +537,23 @@ impl NoiseTransport {
             return Err(anyhow!("Message too large: {} > {}", data.len(), MAX_MESSAGE_SIZE));
         }
 
-        // Encrypt with Noise
-        let len = self.transport.write_message(data, &mut self.write_buffer)?;
-        let noise_payload = &self.write_buffer[..len];
+        // Encrypt with Noise behind a 2-byte gap for the length prefix
+        let len = self.transport.write_message(data, &mut self.write_buffer[2..])?;
 
         // If TLS wrapping is enabled, wrap in TLS Application Data record
         if let Some(ref tls) = self.tls_layer {
-            tls.write_application_data(stream, noise_payload).await
+            tls.write_application_data(stream, &self.write_buffer[2..2 + len]).await
                 .map_err(|e| anyhow!("Failed to write TLS record: {}", e))
         } else {
-            // Write length-prefixed message as before
-            Self::write_message(stream, noise_payload).await
+            if len > MAX_MESSAGE_SIZE {
+                return Err(anyhow!("Message too large: {}", len));
+            }
+
+            // Fill in the length prefix in place so the frame goes out in one write
+            self.write_buffer[..2].copy_from_slice(&(len as u16).to_be_bytes());
+            stream.write_all(&self.write_buffer[..2 + len]).await?;
+            stream.flush().await?;
+            Ok(())
         }
     }
 
@@ -567,6 +586,36 @@ impl NoiseTransport {
         Ok(&buf[..len])
     }
 
+    /// Read the next length-prefixed message after the handshake
+    ///
+    /// Each read pulls in whatever the socket has ready, so a frame usually
+    /// costs one syscall instead of two, and any following frames stay in
+    /// `rx_buffer` for the next call. A partially received frame is kept
+    /// across calls, which also makes this safe to cancel inside `select!`.
+    async fn read_frame<S>(&mut self, stream: &mut S) -> Result<BytesMut>
+    where
+        S: AsyncRead + Unpin,
+    {
+        loop {
+            if self.rx_buffer.len() >= 2 {
+                let len = u16::from_be_bytes([self.rx_buffer[0], self.rx_buffer[1]]) as usize;
+                if self.rx_buffer.len() >= 2 + len {
+                    self.rx_buffer.advance(2);
+                    return Ok(self.rx_buffer.split_to(len));
+                }
+            }
+
+            // Room for a whole frame; reclaims space from consumed frames when possible
+            self.rx_buffer.reserve(RX_BUFFER_SIZE - self.rx_buffer.len());
+
+            let n = stream.read_buf(&mut self.rx_buffer).await
+                .map_err(|e| anyhow!("Failed to read message: {}", e))?;
+            if n == 0 {
+                return Err(anyhow!("Connection closed"));
+            }
+        }
+    }
+
     /// Write length-prefixed message
     async fn write_message<S>(stream: &mut S, data: &[u8]) -> Result<()>
     where
@@ -636,15 +685,22 @@ impl NoiseTransport {
     where
         S: AsyncRead + Unpin,
     {
+        // Bytes left over from framed reads belong to this message
+        if !self.rx_buffer.is_empty() {
+            let encrypted = self.rx_buffer.split();
+            let len = self.transport.read_message(&encrypted, &mut self.write_buffer)?;
+            return Ok(self.write_buffer[..len].to_vec());
+        }
+
         // Read raw encrypted data from stream (no length prefix for UDP/DNS)
-        let mut buf = vec![0u8; MAX_MESSAGE_SIZE + 16]; // Extra space for Noise overhead
-        let n = stream.read(&mut buf).await?;
+        // into the transport's buffer; a Noise message never exceeds its size
+        let n = stream.read(&mut self.read_buffer).await?;
 
         if n == 0 {
             return Err(anyhow!("Connection closed"));
         }
 
-        let encrypted = &buf[..n];
+        let encrypted = &self.read_buffer[..n];
 
         // Decrypt with Noise
         let len = self.transport.read_message(encrypted, &mut self.write_buffer)?;
@@ -812,4 +868,46 @@ mod tests {
         assert!(client_transport.is_valid());
         assert!(server_transport.is_valid());
     }
+
+    #[tokio::test]
+    async fn test_noise_read_back_to_back_messages() {
+        let server_keypair = NoiseKeypair::generate().unwrap();
+
+        let server_config = NoiseConfig {
+            pattern: NoisePattern::NK,
+            local_private_key: Some(server_keypair.private_key_base64()),
+            remote_public_key: None,
+        };
+
+        let client_config = NoiseConfig {
+            pattern: NoisePattern::NK,
+            local_private_key: None,
+            remote_public_key: Some(server_keypair.public_key_base64()),
+        };
+
+        let (mut client_stream, mut server_stream) = duplex(8192);
+
+        let client_handle = tokio::spawn(async move {
+            NoiseTransport::client_handshake(&mut client_stream, &client_config, None).await
+        });
+
+        let server_handle = tokio::spawn(async move {
+            NoiseTransport::server_handshake(&mut server_stream, &server_config, None).await
+        });
+
+        let mut client_transport = client_handle.await.unwrap().unwrap();
+        let mut server_transport = server_handle.await.unwrap().unwrap();
+
+        // Several frames land in one read; each must come back out separately
+        let (mut client_stream, mut server_stream) = duplex(65536);
+        let messages: [&[u8]; 3] = [b"first", b"", b"third message"];
+        for message in messages {
+            client_transport.write(&mut client_stream, message).await.unwrap();
+        }
+
+        for message in messages {
+            let received = server_transport.read(&mut server_stream).await.unwrap();
+            assert_eq!(received, message);
+        }
+    }
 }
@@ -6,7 +6,7 @@ use std::sync::Arc;
 use std::collections::HashMap;
 use tokio::io::{AsyncRead, AsyncReadExt, AsyncWrite, AsyncWriteExt, ReadBuf};
 use tokio::net::{TcpListener, TcpStream, UdpSocket};
-use tokio::sync::{RwLock, Mutex};
+use tokio::sync::{RwLock, Mutex, Semaphore};
 use tokio::time::Duration;
 use crate::noise_transport::{NoiseTransport, NoiseConfig};
 use crate::config::NooshdarooConfig;
@@ -880,6 +880,9 @@ impl HttpProxyServer {
 
         loop {
             let (socket, peer_addr) = listener.accept().await?;
+            if let Err(e) = socket.set_nodelay(true) {
+                log::debug!("Failed to set TCP_NODELAY for {}: {}", peer_addr, e);
+            }
             tokio::spawn(async move {
                 if let Err(e) = handle_http_connection(socket, peer_addr).await {
                     log::error!("HTTP proxy error: {}", e);
@@ -936,6 +939,9 @@ struct DnsSession {
     handshake_complete: bool,
 }
 
+/// Maximum DNS queries handled concurrently by the UDP DNS server
+const MAX_INFLIGHT_DNS_QUERIES: usize = 512;
+
 /// UDP DNS server for dns-udp-tunnel protocol
 pub async fn run_udp_dns_server(
     addr: SocketAddr,
@@ -965,6 +971,9 @@ pub async fn run_udp_dns_server(
         }
     });
 
+    // Caps spawned handlers; once full the loop waits instead of queueing more tasks
+    let inflight = Arc::new(Semaphore::new(MAX_INFLIGHT_DNS_QUERIES));
+
     // Main loop: receive and handle DNS queries
     loop {
         match dns_server.receive_query().await {
@@ -980,8 +989,13 @@ pub async fn run_udp_dns_server(
                 let sessions = Arc::clone(&sessions);
                 let noise_config = noise_config.clone();
                 let config = Arc::clone(&config);
+                let permit = Arc::clone(&inflight)
+                    .acquire_owned()
+                    .await
+                    .expect("query semaphore is never closed");
 
                 tokio::spawn(async move {
+                    let _permit = permit;
                     if let Err(e) = handle_dns_query(
                         dns_server,
                         payload,
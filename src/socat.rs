@@ -180,6 +180,13 @@ async fn relay_connection(
 ) -> Result<(), Box<dyn std::error::Error>> {
     let mut outbound = TcpStream::connect(&connect_to).await?;
 
+    // Relay writes as they arrive instead of letting Nagle batch them
+    for stream in [&inbound, &outbound] {
+        if let Err(e) = stream.set_nodelay(true) {
+            log::debug!("Failed to set TCP_NODELAY for {}: {}", connect_to, e);
+        }
+    }
+
     let (mut ri, mut wi) = inbound.split();
     let (mut ro, mut wo) = outbound.split();
 
@@ -205,6 +212,13 @@ async fn encrypted_relay_connection(
 ) -> Result<(), Box<dyn std::error::Error>> {
     let mut outbound = TcpStream::connect(&connect_to).await?;
 
+    // Relay writes as they arrive instead of letting Nagle batch them
+    for stream in [&inbound, &outbound] {
+        if let Err(e) = stream.set_nodelay(true) {
+            log::debug!("Failed to set TCP_NODELAY for {}: {}", connect_to, e);
+        }
+    }
+
     log::debug!("Encrypted relay using protocol: {}", protocol);
 
     // TODO: Apply Nooshdaroo protocol emulation
@@ -6,7 +6,7 @@
 
 use serde::{Deserialize, Serialize};
 use std::net::{IpAddr, SocketAddr};
-use std::process::Command;
+use std::process::{Command, Stdio};
 use std::time::Duration;
 
 /// A hop in the network path
@@ -160,6 +160,8 @@ impl Traceroute {
             .arg("-w")
             .arg(self.config.timeout_secs.to_string())
             .arg(&target_ip)
+            // Only stdout is parsed; don't capture stderr alongside it
+            .stderr(Stdio::null())
             .output()
             .map_err(|e| format!("Failed to execute traceroute: {}", e))?;
 
@@ -276,8 +278,10 @@ pub fn is_traceroute_available() -> bool {
 
     Command::new(cmd)
         .arg("--help")
-        .output()
-        .map(|o| o.status.success())
+        .stdout(Stdio::null())
+        .stderr(Stdio::null())
+        .status()
+        .map(|status| status.success())
         .unwrap_or(false)
 }
 
@@ -204,9 +204,9 @@ impl UdpProxyServer {
             Self::cleanup_sessions(sessions).await;
         });
 
-        // Main packet handling loop
+        // Main packet handling loop (receive buffer reused across packets)
+        let mut buf = vec![0u8; MAX_UDP_PACKET_SIZE];
         loop {
-            let mut buf = vec![0u8; MAX_UDP_PACKET_SIZE];
             match socket.recv_from(&mut buf).await {
                 Ok((len, client_addr)) => {
                     // Copy packet data to owned Vec for spawned task